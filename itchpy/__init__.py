@@ -1,4 +1,21 @@
-from ._version import get_versions
+"""Python based parser generator for ITCH messages.
 
-__version__ = get_versions()["version"]
-del get_versions
+Compile time: itchc (the command line compiler), lexer, parser, parsetab,
+cpp_gen and py_gen, which need sly and click.
+
+Run time: reader, columnar, index, parallel, native and descriptor, with the
+decoder modules generated by ``itchc --python``.  None of these import the
+compile-time modules, so processes that only decode never load sly or
+click.  Shared by both: itch_types, itch_ast and layout.
+"""
+
+
+def __getattr__(name):
+    # computing the version may run git, so it is deferred until asked for
+    if name == "__version__":
+        from ._version import get_versions
+
+        global __version__
+        __version__ = get_versions()["version"]
+        return __version__
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -9,9 +9,37 @@
 #include ITCHPY_ASSERT_INCLUDE
 #endif
 
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+
+#if defined(__GNUC__) || defined(__clang__)
+#define ITCHPY_PREFETCH(p) __builtin_prefetch(p)
+#else
+#define ITCHPY_PREFETCH(p) ((void)(p))
+#endif
+
+#if !defined(ITCHPY_PREFETCH_DISTANCE)
+// bytes ahead of the current frame that parseBuffer prefetches
+#define ITCHPY_PREFETCH_DISTANCE 256
+#endif
+
 /// @file
 namespace itchpy {
 
+#pragma pack(push, 1)
+/// 48 bit nanoseconds since midnight, laid out as on the wire: a 16 bit high
+/// word followed by a 32 bit low word.
+struct Timestamp {
+  uint16_t hi;
+  uint32_t lo;
+
+  uint64_t value() const { return static_cast<uint64_t>(hi) << 32 | lo; }
+  operator uint64_t() const { return value(); }
+};
+#pragma pack(pop)
+static_assert(sizeof(Timestamp) == 6, "Timestamp does not match its wire size");
+
 template<typename T> T EndianSwap(T t) {
   #if defined(_MSC_VER)
     #define ITCHPY_BYTESWAP16 _byteswap_ushort
@@ -52,5 +80,32 @@ template<typename T> T EndianSwap(T t) {
     return t;
   }
 }
+
+/// Load a big-endian T from a possibly unaligned position in a buffer.
+template<typename T> T LoadBigEndian(const char* p) {
+  T t;
+  std::memcpy(&t, p, sizeof(T));
+  return EndianSwap(t);
+}
+
+/// Load a 48 bit big-endian timestamp, widened to 64 bits.
+inline uint64_t LoadTimestamp(const char* p) {
+  return static_cast<uint64_t>(LoadBigEndian<uint16_t>(p)) << 32 | LoadBigEndian<uint32_t>(p + 2);
+}
+
+/// Call f(msg, size) for every complete frame in buf, a 2 byte big-endian
+/// size followed by the message, and return the bytes consumed:
+/// [buf + consumed, buf + len) is a trailing partial frame.
+template<typename F> size_t ForEachFrame(const char* buf, size_t len, F&& f) {
+  size_t pos = 0;
+  while (pos + 2 <= len) {
+    const size_t size = LoadBigEndian<uint16_t>(buf + pos);
+    if (pos + 2 + size > len)
+      break;
+    f(buf + pos + 2, size);
+    pos += 2 + size;
+  }
+  return pos;
+}
 }  // namespace itchpy
 #endif  // ITCHPY_BASE_H_
\ No newline at end of file
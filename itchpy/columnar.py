@@ -0,0 +1,139 @@
+"""Bulk decoding of length-prefixed ITCH frames into numpy structured arrays.
+
+A frame is a 2 byte big-endian payload length followed by the payload, whose
+first byte is the message_type.  Generated decoder modules call into this
+module with their table of wire dtypes.  Decoded arrays are returned in
+native byte order, with 48 bit time fields widened to uint64.
+"""
+import sys
+from array import array
+
+import numpy as np
+
+from .reader import iter_spans
+
+# wire layout of the 48 bit big-endian time type
+WIRE_TIME = np.dtype((np.uint8, (6,)))
+
+
+def frame_offsets(buf):
+    """Locate every complete frame in buf.
+
+    Returns two arrays, the offsets of the frame payloads and their lengths.
+    A trailing partial frame is not included.
+    """
+    offsets = array("Q")
+    lengths = array("H")
+    for offset, length in iter_spans(buf):
+        offsets.append(offset)
+        lengths.append(length)
+    return np.frombuffer(offsets, dtype=np.uint64), np.frombuffer(lengths, dtype=np.uint16)
+
+
+def frame_types(data, offsets, lengths):
+    """message_type byte of every frame located in the uint8 array data, or
+    0 for empty frames.
+    """
+    types = np.zeros(len(offsets), dtype=np.uint8)
+    nonempty = lengths > 0
+    types[nonempty] = data[offsets[nonempty].astype(np.int64)]
+    return types
+
+
+def gather(data, starts, dtype):
+    """Copy the records beginning at starts out of the uint8 array data into
+    one contiguous array of dtype.
+    """
+    dtype = np.dtype(dtype)
+    starts = np.asarray(starts, dtype=np.int64)
+    if not len(starts):
+        return np.empty(0, dtype=dtype)
+    # rows of a sliding window are the records at every byte offset, so only
+    # the output, not an (N, itemsize) index, is materialised
+    windows = np.lib.stride_tricks.sliding_window_view(data, dtype.itemsize)
+    return windows[starts].view(dtype).reshape(len(starts))
+
+
+def widen_time(raw):
+    """Widen 48 bit big-endian timestamps, given as an (N, 6) uint8 array, to
+    a uint64 array of length N in a single pass.
+    """
+    raw = np.asarray(raw, dtype=np.uint8).reshape(-1, 6)
+    wide = np.zeros((len(raw), 8), dtype=np.uint8)
+    if sys.byteorder == "little":
+        wide[:, :6] = raw[:, ::-1]
+    else:
+        wide[:, 2:] = raw
+    return wide.view(np.uint64).reshape(len(raw))
+
+
+def native_dtype(dtype):
+    """Native byte order counterpart of a wire dtype, with time fields
+    widened to uint64.
+    """
+    fields = []
+    for name in dtype.names:
+        field = dtype.fields[name][0]
+        if field == WIRE_TIME:
+            fields.append((name, np.uint64))
+        else:
+            fields.append((name, field.newbyteorder("=")))
+    return np.dtype(fields)
+
+
+def to_native(records):
+    """Convert a structured array of wire records to native_dtype"""
+    out = np.empty(len(records), dtype=native_dtype(records.dtype))
+    for name in records.dtype.names:
+        if records.dtype.fields[name][0] == WIRE_TIME:
+            out[name] = widen_time(records[name])
+        else:
+            out[name] = records[name]
+    return out
+
+
+def check_lengths(lengths, type_byte, dtype):
+    """Raise ValueError unless every length equals the wire length of dtype"""
+    bad = lengths != dtype.itemsize
+    if np.any(bad):
+        raise ValueError(
+            f"message of type {chr(type_byte)!r} has length {lengths[bad][0]}, expected {dtype.itemsize}"
+        )
+
+
+def decode_columns(buf, dtypes, index=None):
+    """Decode every frame in buf whose message_type byte is a key of dtypes.
+
+    Returns a dict with one structured array of native_dtype per key of
+    dtypes, holding the messages of that type in the order they appear in buf.
+    index is an optional index.FrameIndex of buf, which skips the framing
+    pass.
+    """
+    data = np.frombuffer(buf, dtype=np.uint8)
+    if index is None:
+        offsets, lengths = frame_offsets(buf)
+        types = frame_types(data, offsets, lengths)
+    else:
+        offsets, lengths, types = index.offsets, index.lengths, index.types
+    columns = {}
+    for type_byte, dtype in dtypes.items():
+        mask = types == type_byte
+        check_lengths(lengths[mask], type_byte, dtype)
+        columns[type_byte] = to_native(gather(data, offsets[mask], dtype))
+    return columns
+
+
+def scan_headers(buf, header_dtype, index=None):
+    """Decode only the message prefix shared by every message type, given as
+    the wire dtype header_dtype, from every frame in buf.
+
+    Returns a dict of one contiguous native array per header field, in frame
+    order, without dispatching on the message type.  index is an optional
+    index.FrameIndex of buf, which skips the framing pass.
+    """
+    data = np.frombuffer(buf, dtype=np.uint8)
+    offsets, lengths = frame_offsets(buf) if index is None else (index.offsets, index.lengths)
+    if np.any(lengths < header_dtype.itemsize):
+        raise ValueError("truncated message header")
+    headers = to_native(gather(data, offsets, header_dtype))
+    return {name: np.ascontiguousarray(headers[name]) for name in header_dtype.names}
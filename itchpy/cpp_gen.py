@@ -1,3 +1,4 @@
+from .itch_types import TYPES
 
 
 class CPPGenerator(object):
@@ -56,7 +57,7 @@ class CPPGenerator(object):
         return s
 
     def visit_FieldDecl(self, n):
-        s = f"{self.visit(n.type)} {n.name}"
+        s = f"{TYPES[self.visit(n.type)].cpp_type} {n.name}"
         return s
 
     def visit_Struct(self, n):
@@ -73,6 +74,97 @@ class CPPGenerator(object):
             s += self._make_indent() + "}"
         return s
 
+    def endian_swap(self, layout):
+        """Generate the EndianSwap overload of a layout.StructLayout, which
+        byte swaps exactly its multi-byte fields.
+        """
+        s = f"inline void EndianSwap({layout.name}& msg)\n{{\n"
+        self.indent_level += 2
+        for f in layout.fields:
+            s += "".join(
+                self._make_indent() + stmt + ";\n" for stmt in self._generate_swap(f"msg.{f.name}", f.type)
+            )
+        self.indent_level -= 2
+        s += "}\n"
+        return s
+
+    def layout_asserts(self, layout):
+        """Generate static_asserts pinning a struct's size and field offsets
+        to the wire layout its reinterpret_cast relies on.
+        """
+        name = layout.name
+        s = f'static_assert(sizeof({name}) == {layout.wire_size}, "{name} does not match its wire size");\n'
+        for f in layout.fields:
+            s += (
+                f"static_assert(offsetof({name}, {f.name}) == {f.offset}, "
+                f'"{name}::{f.name} does not match its wire offset");\n'
+            )
+        return s
+
+    def record(self, layout):
+        """Generate <name>Record, the decoded form of a struct in native byte
+        order with time widened to 64 bits; packed, it matches the numpy
+        dtype of columnar.native_dtype.
+        """
+        s = f"struct {layout.name}Record\n{{\n"
+        self.indent_level += 2
+        for f in layout.fields:
+            cpp_type = "uint64_t" if f.type.name == "time" else f.type.cpp_type
+            s += f"{self._make_indent()}{cpp_type} {f.name};\n"
+        self.indent_level -= 2
+        s += "};\n"
+        return s
+
+    def message_type_enum(self, layouts):
+        """Generate the MessageType enum mapping struct names to their
+        message_type byte.
+        """
+        s = "enum class MessageType : char\n{\n"
+        self.indent_level += 2
+        for layout in layouts:
+            s += f"{self._make_indent()}{layout.name} = {layout.message_type!r},\n"
+        self.indent_level -= 2
+        s += "}"
+        return s
+
+    def view(self, layout):
+        """Generate <name>View, a zero-copy view of a struct on the wire whose
+        getters load and byte swap their field on access.
+        """
+        name = f"{layout.name}View"
+        s = f"class {name}\n{{\npublic:\n"
+        self.indent_level += 2
+        indent = self._make_indent()
+        s += f"{indent}static constexpr size_t size = {layout.wire_size};\n\n"
+        s += f"{indent}explicit {name}(const char* buf) : buf_(buf) {{}}\n"
+        s += f"{indent}const char* data() const {{ return buf_; }}\n\n"
+        for f in layout.fields:
+            if f.type.name == "time":
+                s += f"{indent}uint64_t {f.name}() const {{ return LoadTimestamp(buf_ + {f.offset}); }}\n"
+            else:
+                cpp_type = f.type.cpp_type
+                s += f"{indent}{cpp_type} {f.name}() const {{ return LoadBigEndian<{cpp_type}>(buf_ + {f.offset}); }}\n"
+        self.indent_level -= 2
+        s += f"\nprivate:\n{indent}const char* buf_;\n}};\n"
+        return s
+
+    def _generate_swap(self, lvalue, t):
+        if t.name == "time":
+            return [
+                f"{lvalue}.hi = ITCHPY_BYTESWAP16({lvalue}.hi)",
+                f"{lvalue}.lo = ITCHPY_BYTESWAP32({lvalue}.lo)",
+            ]
+        if t.wire_size == 1:
+            return []
+        swap = f"ITCHPY_BYTESWAP{8 * t.wire_size}"
+        if t.cpp_type.startswith("uint"):
+            return [f"{lvalue} = {swap}({lvalue})"]
+        if t.cpp_type.startswith("int"):
+            unsigned = "u" + t.cpp_type
+            return [f"{lvalue} = static_cast<{t.cpp_type}>({swap}(static_cast<{unsigned}>({lvalue})))"]
+        # floating point goes through base.h's union based swap
+        return [f"{lvalue} = EndianSwap({lvalue})"]
+
     def _generate_struct_body(self, members):
         return "".join(self._generate_stmt(member) for member in members)
 
@@ -0,0 +1,138 @@
+"""Stable JSON serialization of a parsed specification and its layout.
+
+A descriptor holds the itch_ast.FileAST of a schema together with its
+layout.SchemaLayout, so tools and long-lived services can load (or reload) a
+schema without ITCHLexer, ITCHParser or sly; generate code from a loaded
+descriptor with message_types(layout), e.g.
+PyGenerator(message_types(layout)).visit(ast).  The document is versioned;
+types are referred to by their itch_types.TYPES name:
+
+    {"format": "itchpy-schema", "version": 1,
+     "decls": [{"kind": "enum", "name": ..., "type": ..., "values": [{"name": ..., "value": ...}]},
+               {"kind": "struct", "name": ..., "fields": [{"name": ..., "type": ...}]}],
+     "layout": {"structs": [{"name": ..., "message_type": ..., "wire_size": ..., "native_size": ...,
+                             "fields": [{"name": ..., "type": ..., "offset": ..., "wire_size": ..., "native_size": ...}]}],
+                "header": [<names of the shared leading fields>]}}
+"""
+import json
+
+from . import itch_ast as i_ast
+from .itch_types import TYPES
+from .layout import FieldLayout, SchemaLayout, StructLayout, compute_layout
+
+DESCRIPTOR_FORMAT = "itchpy-schema"
+
+# bumped whenever the document layout changes incompatibly
+DESCRIPTOR_VERSION = 1
+
+
+def _decl_to_dict(decl):
+    if isinstance(decl, i_ast.Enum):
+        return {
+            "kind": "enum",
+            "name": decl.name,
+            "type": decl.typeid.name,
+            "values": [{"name": e.name, "value": e.value} for e in decl.values.enumerators],
+        }
+    if isinstance(decl, i_ast.Struct):
+        return {
+            "kind": "struct",
+            "name": decl.name,
+            "fields": [{"name": f.name, "type": f.type.name} for f in decl.fields or []],
+        }
+    raise TypeError(f"cannot describe {decl.__class__.__name__} declarations")
+
+
+def _decl_from_dict(d):
+    if d["kind"] == "enum":
+        values = i_ast.EnumeratorList([i_ast.Enumerator(e["name"], e["value"]) for e in d["values"]])
+        return i_ast.Enum(d["name"], i_ast.ID(d["type"]), values)
+    if d["kind"] == "struct":
+        return i_ast.Struct(d["name"], [i_ast.FieldDecl(f["name"], i_ast.ID(f["type"])) for f in d["fields"]])
+    raise ValueError(f"unknown declaration kind {d['kind']!r}")
+
+
+def _field_to_dict(f):
+    return {
+        "name": f.name,
+        "type": f.type.name,
+        "offset": f.offset,
+        "wire_size": f.wire_size,
+        "native_size": f.native_size,
+    }
+
+
+def _field_from_dict(d):
+    return FieldLayout(d["name"], TYPES[d["type"]], d["offset"], d["wire_size"], d["native_size"])
+
+
+def to_dict(ast, layout=None, message_types=None):
+    """Describe ast, with its layout (computed with message_types when not
+    given), as a dict of JSON types
+    """
+    if layout is None:
+        layout = compute_layout(ast, message_types)
+    return {
+        "format": DESCRIPTOR_FORMAT,
+        "version": DESCRIPTOR_VERSION,
+        "decls": [_decl_to_dict(d) for d in ast.decls],
+        "layout": {
+            "structs": [
+                {
+                    "name": s.name,
+                    "message_type": s.message_type,
+                    "wire_size": s.wire_size,
+                    "native_size": s.native_size,
+                    "fields": [_field_to_dict(f) for f in s.fields],
+                }
+                for s in layout.structs
+            ],
+            "header": [f.name for f in layout.header],
+        },
+    }
+
+
+def from_dict(d):
+    """Return the (FileAST, SchemaLayout) described by a dict from to_dict"""
+    if d.get("format") != DESCRIPTOR_FORMAT:
+        raise ValueError("not an itchpy schema descriptor")
+    if d.get("version") != DESCRIPTOR_VERSION:
+        raise ValueError(f"unsupported descriptor version {d.get('version')!r}, expected {DESCRIPTOR_VERSION}")
+    ast = i_ast.FileAST([_decl_from_dict(decl) for decl in d["decls"]])
+    structs = [
+        StructLayout(
+            s["name"],
+            s["message_type"],
+            [_field_from_dict(f) for f in s["fields"]],
+            s["wire_size"],
+            s["native_size"],
+        )
+        for s in d["layout"]["structs"]
+    ]
+    header = structs[0].fields[: len(d["layout"]["header"])] if structs else []
+    return ast, SchemaLayout(structs, header)
+
+
+def message_types(layout):
+    """The struct name to message_type mapping a layout was computed with, to
+    pass as message_types when generating code from a loaded descriptor
+    """
+    return {s.name: s.message_type for s in layout.structs if s.message_type is not None}
+
+
+def dumps(ast, layout=None, message_types=None):
+    """Serialize ast and its layout to a JSON descriptor (str)"""
+    return json.dumps(to_dict(ast, layout, message_types), indent=2) + "\n"
+
+
+def loads(s):
+    """Return the (FileAST, SchemaLayout) of a JSON descriptor"""
+    return from_dict(json.loads(s))
+
+
+def dump(ast, fp, layout=None, message_types=None):
+    fp.write(dumps(ast, layout, message_types))
+
+
+def load(fp):
+    return loads(fp.read())
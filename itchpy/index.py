@@ -0,0 +1,130 @@
+"""Frame index of an ITCH file, cached in a sidecar file.
+
+One sequential pass records the payload offset, payload length and
+message_type byte of every frame.  The index is saved next to the data file
+as <file>.idx and reused until the file's size, mtime or leading bytes
+change, so later jobs can count, seek to or extract a message type without
+rescanning the file.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+from .columnar import check_lengths, frame_offsets, frame_types, gather, to_native
+from .reader import ItchFile
+
+# bumped whenever the sidecar layout changes
+INDEX_VERSION = 1
+
+# leading bytes of the data file covered by the header hash
+HEADER_SIZE = 1 << 16
+
+
+def sidecar_path(path):
+    return os.fspath(path) + ".idx"
+
+
+def file_stamp(path):
+    """Identify the current contents of path by its size, mtime and a hash of
+    its first HEADER_SIZE bytes.
+    """
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        digest = hashlib.sha1(f.read(HEADER_SIZE)).digest()
+    return st.st_size, st.st_mtime_ns, digest
+
+
+class FrameIndex(object):
+    """Offsets (uint64), lengths (uint16) and message_type bytes (uint8) of
+    the payload of every frame in a buffer, in file order.
+    """
+
+    def __init__(self, offsets, lengths, types):
+        self.offsets = offsets
+        self.lengths = lengths
+        self.types = types
+
+    @classmethod
+    def build(cls, buf):
+        """Index every complete frame in buf in one pass"""
+        offsets, lengths = frame_offsets(buf)
+        types = frame_types(np.frombuffer(buf, dtype=np.uint8), offsets, lengths)
+        return cls(offsets, lengths, types)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def count(self, type_byte):
+        """Number of frames of the given message type"""
+        return int(np.count_nonzero(self.types == type_byte))
+
+    def select(self, type_byte):
+        """Payload offsets of the frames of the given message type"""
+        return self.offsets[self.types == type_byte]
+
+    def extract(self, buf, type_byte, dtype):
+        """Gather the frames of the given message type from buf into one
+        structured array, decoding the wire dtype to columnar.native_dtype.
+        """
+        mask = self.types == type_byte
+        check_lengths(self.lengths[mask], type_byte, np.dtype(dtype))
+        return to_native(gather(np.frombuffer(buf, dtype=np.uint8), self.offsets[mask], dtype))
+
+    def save(self, path, stamp):
+        """Write the index to path, tagged with the stamp of its data file"""
+        size, mtime_ns, digest = stamp
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(
+                    f,
+                    meta=np.array([INDEX_VERSION, size, mtime_ns], dtype=np.uint64),
+                    digest=np.frombuffer(digest, dtype=np.uint8),
+                    offsets=self.offsets,
+                    lengths=self.lengths,
+                    types=self.types,
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path, stamp):
+        """Read the index at path, or return None if it is missing, of another
+        version or was built from different file contents.
+        """
+        size, mtime_ns, digest = stamp
+        try:
+            with np.load(path) as data:
+                meta = data["meta"].tolist()
+                if meta != [INDEX_VERSION, size, mtime_ns]:
+                    return None
+                if data["digest"].tobytes() != digest:
+                    return None
+                return cls(data["offsets"], data["lengths"], data["types"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def load_index(path, rebuild=False):
+    """Return the FrameIndex of the ITCH file at path, reusing its sidecar
+    when still valid and otherwise scanning the file and saving a new one,
+    unless its directory is not writable.
+    """
+    stamp = file_stamp(path)
+    idx_path = sidecar_path(path)
+    if not rebuild:
+        index = FrameIndex.load(idx_path, stamp)
+        if index is not None:
+            return index
+    with ItchFile(path) as f:
+        index = FrameIndex.build(f.buffer)
+    try:
+        index.save(idx_path, stamp)
+    except OSError:
+        # e.g. a read-only mount; the index is still good for this process
+        pass
+    return index
@@ -0,0 +1,52 @@
+from collections import namedtuple
+
+# Primitive schema types, as tokenized by lexer.ITCHLexer.  All multi-byte
+# values are big-endian on the wire.
+#   wire_size:     bytes occupied in a message on the wire
+#   native_size:   bytes occupied once decoded
+#   struct_format: struct module format code(s) used to read the wire bytes
+#   wire_dtype:    numpy dtype of the wire bytes
+#   cpp_type:      C++ type of the field in the packed message structs
+ItchType = namedtuple(
+    "ItchType", ["name", "wire_size", "native_size", "struct_format", "wire_dtype", "cpp_type"]
+)
+
+TYPES = {
+    "char": ItchType("char", 1, 1, "c", "S1", "char"),
+    "ushort": ItchType("ushort", 2, 2, "H", ">u2", "uint16_t"),
+    "short": ItchType("short", 2, 2, "h", ">i2", "int16_t"),
+    "ulong": ItchType("ulong", 4, 4, "I", ">u4", "uint32_t"),
+    "long": ItchType("long", 4, 4, "i", ">i4", "int32_t"),
+    "double": ItchType("double", 8, 8, "d", ">f8", "double"),
+    # 48 bit nanoseconds since midnight, read as a 16 bit high word followed
+    # by a 32 bit low word and widened to 64 bits.  numpy sees the six raw
+    # bytes, C++ the two words of base.h's Timestamp.
+    "time": ItchType("time", 6, 8, "HI", "6u1", "Timestamp"),
+}
+
+# message_type byte of each NASDAQ TotalView-ITCH 5.0 message, keyed on the
+# struct name used in the schema
+MESSAGE_TYPES = {
+    "SystemEventMessage": "S",
+    "StockDirectoryMessage": "R",
+    "StockTradingActionMessage": "H",
+    "RegSHORestrictionMessage": "Y",
+    "MarketParticipantPositionMessage": "L",
+    "MWCBDeclineLevelMessage": "V",
+    "MWCBStatusMessage": "W",
+    "IPOQuotingPeriodUpdateMessage": "K",
+    "LULDAuctionCollarMessage": "J",
+    "OperationalHaltMessage": "h",
+    "AddOrderMessage": "A",
+    "AddOrderMPIDAttributionMessage": "F",
+    "OrderExecutedMessage": "E",
+    "OrderExecutedWithPriceMessage": "C",
+    "OrderCancelMessage": "X",
+    "OrderDeleteMessage": "D",
+    "OrderReplaceMessage": "U",
+    "TradeMessage": "P",
+    "CrossTradeMessage": "Q",
+    "BrokenTradeMessage": "B",
+    "NOIIMessage": "I",
+    "RPIIMessage": "N",
+}
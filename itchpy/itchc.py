@@ -1,31 +1,232 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
 import sys
+import tempfile
 import textwrap
+from concurrent.futures import ProcessPoolExecutor
 
 import click
 
-from cpp_gen import CPPGenerator
-from parser import ITCHParser
-from lexer import ITCHLexer
-from itch_ast import Enum, Struct
+from .cpp_gen import CPPGenerator
+from .py_gen import PyGenerator
+from .parser import ITCHParser
+from .lexer import ITCHLexer
+from .itch_ast import Enum, Struct
+from .layout import compute_layout
+from . import descriptor
+from .parsetab import cache_root
+
+# bumped whenever the layout of the output cache changes
+OUTPUT_CACHE_VERSION = 1
+
+# sources whose contents determine the generated outputs
+COMPILER_SOURCES = (
+    "itchc.py",
+    "cpp_gen.py",
+    "py_gen.py",
+    "layout.py",
+    "itch_types.py",
+    "itch_ast.py",
+    "lexer.py",
+    "parser.py",
+    "descriptor.py",
+    "base.h",
+)
+
+
+def include_name(fp):
+    """ name an output is #included by, given its path or open file """
+    return os.fspath(fp) if isinstance(fp, (str, os.PathLike)) else fp.name
+
+
+def compiler_version():
+    """ hash of the compiler's own sources, so that editing the generators
+    invalidates cached outputs even when the package version is unchanged
+    """
+    h = hashlib.sha256()
+    here = os.path.dirname(__file__)
+    for name in COMPILER_SOURCES:
+        with open(os.path.join(here, name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def output_key(data, **options):
+    """ hash of a schema, the compiler version and the compile options """
+    h = hashlib.sha256(compiler_version().encode())
+    h.update(json.dumps(options, sort_keys=True, default=os.fspath).encode())
+    h.update(data.encode())
+    return h.hexdigest()
+
+
+def find_cxx():
+    """ the C++ compiler: $CXX, else the first of g++, c++ and clang++ on PATH """
+    return os.environ.get("CXX") or shutil.which("g++") or shutil.which("c++") or shutil.which("clang++")
+
+
+def cxx_identity():
+    """ resolved path and --version output of the C++ compiler, or None """
+    cxx = find_cxx()
+    if cxx is None:
+        return None
+    path = shutil.which(cxx) or cxx
+    try:
+        version = subprocess.run([path, "--version"], capture_output=True, text=True).stdout
+    except OSError:
+        version = ""
+    return [os.path.realpath(path), version]
+
+
+def output_cache_dir(key):
+    return os.path.join(cache_root(), f"outputs-v{OUTPUT_CACHE_VERSION}", key)
+
+
+def load_outputs(key, roles):
+    """ return the cached outputs (bytes) of each role under key, or None """
+    directory = output_cache_dir(key)
+    outputs = {}
+    try:
+        for role in roles:
+            with open(os.path.join(directory, role), "rb") as f:
+                outputs[role] = f.read()
+    except OSError:
+        return None
+    return outputs
+
+
+def save_outputs(key, outputs):
+    """ cache the outputs (bytes) of each role under key """
+    directory = output_cache_dir(key)
+    tmp = f"{directory}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(tmp, exist_ok=True)
+        for role, output in outputs.items():
+            with open(os.path.join(tmp, role), "wb") as f:
+                f.write(output)
+        os.replace(tmp, directory)
+    except OSError:
+        # another process cached the same key first, or the cache is unwritable
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def write_if_changed(path, output):
+    """ write output (bytes) to path unless it already holds exactly that,
+    leaving its mtime alone for incremental builds; returns whether it wrote
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read() == output:
+                return False
+    except OSError:
+        pass
+    with open(path, "wb") as f:
+        f.write(output)
+    return True
 
 
 class ItchCompiler(object):
-    namespace = "\nnamespace itchpy {\n"
     footer = "\n}\n"
     tab = '    '
-    def __init__(self):
+    dispatch_modes = ("switch", "table")
+
+    def __init__(self, views=False, dispatch="switch", namespace="itchpy", message_types=None):
+        """ views also generates zero-copy message views and parseView.
+        dispatch selects how parse() picks the message type: a switch, or a
+        constexpr 256 entry table indexed by the type byte.
+        namespace is the C++ namespace of the generated code, so that parsers
+        of several schemas can be linked into one program.
+        message_types is passed on to layout.LayoutPass.
+        """
+        if dispatch not in self.dispatch_modes:
+            raise ValueError(f"unknown dispatch mode {dispatch!r}")
+        if not all(part.isidentifier() for part in namespace.split("::")):
+            raise ValueError(f"invalid namespace {namespace!r}")
+        self.ns = namespace
+        self.namespace = f"\nnamespace {namespace} {{\n"
+        self.views = views
+        self.dispatch = dispatch
+        self.message_types = message_types
         self.gen = CPPGenerator()
         self.lexer = ITCHLexer()
         self.parser = ITCHParser()
         self.ast = None
+        self.layout = None
 
-    def compile(self, data, enums_fp, structs_fp):
+    def parse(self, data):
+        """ parse a specification into self.ast and compute its layout, the
+        field offsets and sizes, once into self.layout
+        """
         self.ast = self.parser.parse(self.lexer.tokenize(data))
+        self.layout = compute_layout(self.ast, self.message_types)
+
+    def compile(self, data, enums_fp, structs_fp):
+        self.parse(data)
         enums_str = self._gen_enums()
         structs_str = self._gen_structs(enums_fp)
         parser_str = self._gen_parser(enums_fp, structs_fp)
         return enums_str, structs_str, parser_str
 
+    def build_shared_lib(self, data, lib_path, cxx=None):
+        """ compile the generated parser and its C ABI (see _gen_native) into
+        a shared library at lib_path with the local C++ compiler
+        """
+        cxx = cxx or find_cxx()
+        if cxx is None:
+            raise RuntimeError("no C++ compiler found, set CXX")
+        with tempfile.TemporaryDirectory() as tmp:
+            shutil.copy(os.path.join(os.path.dirname(__file__), "base.h"), tmp)
+            paths = [os.path.join(tmp, name) for name in ("enums.h", "structs.h", "parser.h")]
+            with open(paths[0], "w") as enums, open(paths[1], "w") as structs, open(paths[2], "w") as parser:
+                for f, output in zip((enums, structs, parser), self.compile(data, enums, structs)):
+                    f.write(output)
+            source = os.path.join(tmp, "native.cpp")
+            with open(source, "w") as f:
+                f.write(self._gen_native(parser))
+            subprocess.run(
+                [cxx, "-std=c++17", "-O2", "-shared", "-fPIC", "-o", os.fspath(lib_path), source], check=True
+            )
+
+    def compile_outputs(self, data, targets):
+        """ generate the output (bytes) of each role in targets, a dict mapping
+        "enums", "structs", "parser" and optionally "python", "descriptor",
+        "bench" and "shared_lib" to output paths
+        """
+        names = zip(("enums", "structs", "parser"), self.compile(data, targets["enums"], targets["structs"]))
+        outputs = {role: output.encode() for role, output in names}
+        if "python" in targets:
+            outputs["python"] = self.compile_python(data).encode()
+        if "descriptor" in targets:
+            outputs["descriptor"] = self.compile_descriptor(data).encode()
+        if "bench" in targets:
+            outputs["bench"] = self.compile_bench(data, targets["parser"]).encode()
+        if "shared_lib" in targets:
+            with tempfile.TemporaryDirectory() as tmp:
+                lib_path = os.path.join(tmp, "lib.so")
+                self.build_shared_lib(data, lib_path)
+                with open(lib_path, "rb") as f:
+                    outputs["shared_lib"] = f.read()
+        return outputs
+
+    def compile_bench(self, data, parser_fp):
+        """ generate standalone C++ benchmark (str) of the parser in parser_fp """
+        self.parse(data)
+        return self._gen_bench(parser_fp)
+
+    def compile_descriptor(self, data):
+        """ generate JSON schema descriptor (str), see itchpy.descriptor """
+        self.parse(data)
+        return descriptor.dumps(self.ast, self.layout)
+
+    def compile_python(self, data):
+        """ generate Python decoder module (str) """
+        self.parse(data)
+        return PyGenerator(self.message_types).visit(self.ast)
+
     @property
     def enums(self):
         return [d for d in self.ast.decls if isinstance(d, Enum)]
@@ -33,21 +234,42 @@ class ItchCompiler(object):
     @property
     def structs(self):
         return [d for d in self.ast.decls if isinstance(d, Struct)]
-    
+
     def _gen_enums(self):
         """ generate file (str) of enum definitions """
-        header = f"{self.namespace}"
-        return header + "/n".join(self.gen.visit_Enum(e) for e in self.enums) + self.footer
+        header = f"#pragma once\n{self.namespace}"
+        enums_str = "\n".join(self.gen.visit_Enum(e) + ";\n" for e in self.enums)
+        if not any(e.name == "MessageType" for e in self.enums):
+            enums_str += "\n" + self.gen.message_type_enum(self.layout.structs) + ";\n"
+        return header + enums_str + self.footer
 
     def _gen_structs(self, enums_fp):
         """ generate file (str) of struct (message) definitions """
-        header = f'#include "{enums_fp.name}"\n\n {self.namespace}'
-        struct_str = "/n ".join(self.gen.visit_Struct(e) for e in self.structs)
-        return header + "#pragma pack(push, 1):\n\n" + struct_str + "\n\n#pragma pack(pop)" + self.footer
+        header = f'#pragma once\n#include "base.h"\n#include "{include_name(enums_fp)}"\n\n {self.namespace}'
+        if self.ns != "itchpy":
+            header += "".join(
+                f"{self.tab}using ::itchpy::{name};\n"
+                for name in ("Timestamp", "EndianSwap", "LoadBigEndian", "LoadTimestamp", "ForEachFrame")
+            ) + "\n"
+        struct_str = "\n".join(self.gen.visit_Struct(e) + ";\n" for e in self.structs)
+        assert_str = "\n".join(self.gen.layout_asserts(s) for s in self.layout.structs)
+        swap_str = "\n".join(self.gen.endian_swap(s) for s in self.layout.structs)
+        if self.views:
+            swap_str += "\n" + "\n".join(self.gen.view(s) for s in self.layout.structs)
+        return (
+            header
+            + "#pragma pack(push, 1)\n\n"
+            + struct_str
+            + "\n#pragma pack(pop)\n\n"
+            + assert_str
+            + "\n"
+            + swap_str
+            + self.footer
+        )
     
     def _gen_parser(self, enums_fp, structs_fp):
         """ generate file (str) of parser """
-        header = f'#pragma once\n#include "base.h"\n#include "{enums_fp.name}"\n#include "{structs_fp.name}"\n\n {self.namespace}'
+        header = f'#pragma once\n#include <array>\n#include <type_traits>\n#include <utility>\n\n#include "base.h"\n#include "{include_name(enums_fp)}"\n#include "{include_name(structs_fp)}"\n\n {self.namespace}'
         header += """    enum class ParseStatus
     {
         // Message was parsed successfully and handler was invoked.
@@ -58,7 +280,43 @@ class ItchCompiler(object):
 
         // The message was too short for the given message type and is possibly corrupted.
         Truncated,
+
+        // The message type is not in the subscription; the message was not parsed.
+        Skipped,
+
+        // The message was longer than the wire length of its type.
+        Oversized,
     };
+
+    // Compile-time set of the message types parse() hands to its handler.
+    template<MessageType... Types>
+    struct Subscribe
+    {
+        static constexpr bool contains(MessageType type)
+        {
+            return ((type == Types) || ...);
+        }
+    };
+"""
+        header += "\n    // Every message type in the specification.\n"
+        header += "    using SubscribeAll = Subscribe<"
+        header += ", ".join(f"MessageType::{s.name}" for s in self.layout.structs)
+        header += ">;\n"
+        header += """
+    // Wire length of every message type, indexed by its type byte; 0 for
+    // types not in the specification.
+    constexpr std::array<size_t, 256> makeWireLengths()
+    {
+        std::array<size_t, 256> lengths{};
+"""
+        for s in self.layout.structs:
+            header += textwrap.indent(
+                f"lengths[static_cast<unsigned char>(MessageType::{s.name})] = {s.wire_size};\n", 2*self.tab
+            )
+        header += """        return lengths;
+    }
+
+    inline constexpr std::array<size_t, 256> wireLengths = makeWireLengths();
 """
         header += """ 
     template<typename MsgType, typename Handler>
@@ -66,44 +324,640 @@ class ItchCompiler(object):
     {
         if (len < sizeof(MsgType))
             return ParseStatus::Truncated;
+        if (len > sizeof(MsgType))
+            return ParseStatus::Oversized;
         MsgType msg{*reinterpret_cast<const MsgType*>(buf)};
         EndianSwap(msg);
         handler(msg);
         return ParseStatus::OK;
     };
 """
+        header += self._gen_handler()
+        if self.dispatch == "table":
+            body = self._gen_table_parse()
+        else:
+            body = self._gen_switch_parse()
+        body += self._gen_parse_buffer()
+        if self.views:
+            body += self._gen_parse_view()
+        return header + body + self.footer
+
+    def _gen_handler(self):
+        """ generate the MessageHandler CRTP base, with an empty inline onX
+        hook per message, and the Handled subscription of a handler's hooks
+        """
+        body = """
+    // CRTP base for handlers: derive `struct MyHandler : MessageHandler<MyHandler>`
+    // and define the onX hooks of interest; the others stay empty no-ops.
+    template<typename Derived>
+    struct MessageHandler
+    {
+"""
+        for s in self.layout.structs:
+            body += textwrap.indent(f"void on{s.name}(const {s.name}&) {{}}\n", 2*self.tab)
+        body += "\n"
+        for s in self.layout.structs:
+            body += textwrap.indent(f"void operator()(const {s.name}& msg)\n", 2*self.tab)
+            body += textwrap.indent("{\n", 2*self.tab)
+            body += textwrap.indent(f"static_cast<Derived*>(this)->on{s.name}(msg);\n", 3*self.tab)
+            body += textwrap.indent("}\n", 2*self.tab)
+        body += """    };
+
+    // Subscription of the message types Derived defines an onX hook for, so
+    // parse<Handled<Derived>>() skips the rest without parsing them.
+    template<typename Derived>
+    struct Handled
+    {
+        static constexpr bool contains(MessageType type)
+        {
+            switch (type) {
+"""
+        for s in self.layout.structs:
+            body += textwrap.indent(f"case MessageType::{s.name}:\n", 3*self.tab)
+            body += textwrap.indent(
+                f"return !std::is_same_v<decltype(&Derived::on{s.name}), "
+                f"void (MessageHandler<Derived>::*)(const {s.name}&)>;\n",
+                4*self.tab,
+            )
+        body += """            default:
+                return false;
+            }
+        }
+    };
+"""
+        return body
+
+    def _gen_switch_parse(self):
+        """ generate parse, dispatching with a switch on the type byte """
+        body = """
+    template<typename Subscription = SubscribeAll, typename Handler>
+    ParseStatus parse(const char* msg, size_t len, Handler&& handler)
+    {
+        if (len < 1)
+            return ParseStatus::Truncated;
+        switch (MessageType(msg[0])) {
+"""
+        for s in self.layout.structs:
+            body += textwrap.indent(f"case MessageType::{s.name}:\n", 2*self.tab)
+            body += textwrap.indent(f"if constexpr (Subscription::contains(MessageType::{s.name}))\n", 3*self.tab)
+            body += textwrap.indent(f"return parseAs<{s.name}>(msg, len, std::forward<Handler>(handler));\n", 4*self.tab)
+            body += textwrap.indent("else\n", 3*self.tab)
+            body += textwrap.indent("return ParseStatus::Skipped;\n", 4*self.tab)
+        body += """        default:
+            return ParseStatus::UnknownMessageType;
+        }
+    }
+"""
+        return body
+
+    def _gen_table_parse(self):
+        """ generate parse, dispatching with one load from a constexpr table
+        of wire lengths and parse thunks indexed by the type byte
+        """
         body = """
     template<typename Handler>
+    struct DispatchEntry
+    {
+        // Wire length of the message type, 0 for types not in the specification.
+        size_t length;
+
+        ParseStatus (*parse)(const char* buf, size_t len, Handler& handler);
+    };
+
+    template<typename Subscription, typename Handler>
+    struct DispatchTable
+    {
+        template<typename MsgType>
+        static ParseStatus thunk(const char* buf, size_t len, Handler& handler)
+        {
+            return parseAs<MsgType>(buf, len, handler);
+        }
+
+        static ParseStatus skip(const char*, size_t, Handler&)
+        {
+            return ParseStatus::Skipped;
+        }
+
+        // Unsubscribed types get the skip thunk and never instantiate parseAs.
+        template<MessageType Type, typename MsgType>
+        static constexpr DispatchEntry<Handler> entry()
+        {
+            if constexpr (Subscription::contains(Type))
+                return {sizeof(MsgType), &thunk<MsgType>};
+            else
+                return {0, &skip};
+        }
+
+        static constexpr std::array<DispatchEntry<Handler>, 256> make()
+        {
+            std::array<DispatchEntry<Handler>, 256> entries{};
+"""
+        for s in self.layout.structs:
+            body += textwrap.indent(
+                f"entries[static_cast<unsigned char>(MessageType::{s.name})] = entry<MessageType::{s.name}, {s.name}>();\n",
+                3*self.tab,
+            )
+        body += """            return entries;
+        }
+
+        static constexpr std::array<DispatchEntry<Handler>, 256> entries = make();
+    };
+
+    template<typename Subscription = SubscribeAll, typename Handler>
     ParseStatus parse(const char* msg, size_t len, Handler&& handler)
+    {
+        if (len < 1)
+            return ParseStatus::Truncated;
+        using Table = DispatchTable<Subscription, std::remove_reference_t<Handler>>;
+        const auto& entry = Table::entries[static_cast<unsigned char>(msg[0])];
+        if (entry.parse == nullptr)
+            return ParseStatus::UnknownMessageType;
+        if (len < entry.length)
+            return ParseStatus::Truncated;
+        return entry.parse(msg, len, handler);
+    }
+"""
+        return body
+
+    def _gen_parse_buffer(self):
+        """ generate parseBuffer, framing and parsing a whole buffer """
+        return """
+    struct BufferResult
+    {
+        // Number of complete frames (or messages) handed to parse().
+        size_t frames;
+
+        // Bytes consumed; [buf + consumed, buf + len) is left unparsed, e.g. a
+        // trailing partial frame.
+        size_t consumed;
+
+        // Frames whose length did not match the wire length of their type.
+        size_t malformed;
+    };
+
+    // Parse every complete frame, a 2 byte big-endian length followed by the
+    // message, in buf.
+    template<typename Subscription = SubscribeAll, typename Handler>
+    BufferResult parseBuffer(const char* buf, size_t len, Handler&& handler)
+    {
+        size_t frames = 0;
+        size_t malformed = 0;
+        const size_t consumed = ForEachFrame(buf, len, [&](const char* msg, size_t size) {
+            ITCHPY_PREFETCH(msg + ITCHPY_PREFETCH_DISTANCE);
+            const ParseStatus status = parse<Subscription>(msg, size, handler);
+            malformed += status == ParseStatus::Truncated || status == ParseStatus::Oversized;
+            ++frames;
+        });
+        return BufferResult{frames, consumed, malformed};
+    }
+
+    // Parse a block of messages concatenated without length prefixes, such
+    // as a MoldUDP payload, stepping by the wire length of each type.  Stops
+    // at a partial message or a type not in the specification.
+    template<typename Subscription = SubscribeAll, typename Handler>
+    BufferResult parseBlock(const char* buf, size_t len, Handler&& handler)
+    {
+        size_t pos = 0;
+        size_t frames = 0;
+        while (pos < len) {
+            const size_t size = wireLengths[static_cast<unsigned char>(buf[pos])];
+            if (size == 0 || pos + size > len)
+                break;
+            ITCHPY_PREFETCH(buf + pos + ITCHPY_PREFETCH_DISTANCE);
+            parse<Subscription>(buf + pos, size, handler);
+            pos += size;
+            ++frames;
+        }
+        return BufferResult{frames, pos, 0};
+    }
+"""
+
+    def _gen_native(self, parser_fp):
+        """ generate C++ source (str) of a C ABI decoding length-prefixed frames
+        into caller-provided arrays of packed native records, one array per
+        message type, as loaded by itchpy.native
+        """
+        body = f'// C ABI for bulk decoding, generated by itchpy.\n#include "{include_name(parser_fp)}"\n'
+        body += f"\nnamespace schema = {self.ns};\n"
+        body += """
+extern "C" {
+    // Room for capacity records of one message type, of which count are filled.
+    struct itchpy_column
+    {
+        void* records;
+        size_t capacity;
+        size_t count;
+    };
+}
+"""
+        body += self.namespace + "#pragma pack(push, 1)\n\n"
+        body += "\n".join(self.gen.record(s) for s in self.layout.structs)
+        body += "\n#pragma pack(pop)\n"
+        body += """
+    // Appends every message to the column of its type while there is room.
+    struct ColumnWriter : MessageHandler<ColumnWriter>
+    {
+        explicit ColumnWriter(itchpy_column* columns) : columns(columns) {}
+"""
+        for s in self.layout.structs:
+            body += f"\n{2*self.tab}void on{s.name}(const {s.name}& msg)\n{2*self.tab}{{\n"
+            body += textwrap.indent(
+                f"itchpy_column& column = columns[static_cast<unsigned char>(MessageType::{s.name})];\n"
+                "if (column.count == column.capacity)\n"
+                f"{self.tab}return;\n"
+                f"{s.name}Record& record = static_cast<{s.name}Record*>(column.records)[column.count++];\n",
+                3*self.tab,
+            )
+            for f in s.fields:
+                value = f"msg.{f.name}.value()" if f.type.name == "time" else f"msg.{f.name}"
+                body += f"{3*self.tab}record.{f.name} = {value};\n"
+            body += f"{2*self.tab}}}\n"
+        body += """
+        itchpy_column* columns;
+    };
+}
+
+extern "C" {
+    // Size of the record of a message type, 0 for types not in the specification.
+    size_t itchpy_record_size(unsigned char type)
+    {
+        switch (schema::MessageType(type)) {
+"""
+        for s in self.layout.structs:
+            body += textwrap.indent(f"case schema::MessageType::{s.name}:\n", 2*self.tab)
+            body += textwrap.indent(f"return sizeof(schema::{s.name}Record);\n", 3*self.tab)
+        body += """        default:
+            return 0;
+        }
+    }
+
+    // Add the number of complete frames of each type byte in buf to counts[256].
+    void itchpy_count(const char* buf, size_t len, size_t* counts)
+    {
+        schema::ForEachFrame(buf, len, [counts](const char* msg, size_t size) {
+            if (size > 0)
+                ++counts[static_cast<unsigned char>(msg[0])];
+        });
+    }
+
+    // Decode every complete frame in buf into columns[256], indexed by type
+    // byte.  Frames whose column has no records are skipped before they are
+    // parsed.  Sets *malformed to the number of decoded frames of the wrong
+    // length and returns the bytes consumed.
+    size_t itchpy_decode(const char* buf, size_t len, itchpy_column* columns, size_t* malformed)
+    {
+        schema::ColumnWriter writer(columns);
+        *malformed = 0;
+        return schema::ForEachFrame(buf, len, [&](const char* msg, size_t size) {
+            ITCHPY_PREFETCH(msg + ITCHPY_PREFETCH_DISTANCE);
+            if (size == 0 || columns[static_cast<unsigned char>(msg[0])].records == nullptr)
+                return;
+            const schema::ParseStatus status = schema::parse(msg, size, writer);
+            *malformed += status == schema::ParseStatus::Truncated || status == schema::ParseStatus::Oversized;
+        });
+    }
+}
+"""
+        return body
+
+    def _gen_bench(self, parser_fp):
+        """ generate C++ program (str) timing parseBuffer with a no-op handler
+        over a memory-mapped file, in total and for each message type
+        """
+        body = f"""// Throughput benchmark of the generated parser, generated by itchpy.
+//
+// Usage: bench FILE [REPEAT]
+//
+// Times parseBuffer over the length-prefixed frames of FILE with a handler
+// that does nothing, then over the frames of each message type alone,
+// reporting the best of REPEAT (default 5) runs.
+#include <algorithm>
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <vector>
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include "{include_name(parser_fp)}"
+
+namespace schema = {self.ns};
+"""
+        body += """
+namespace {
+    // Keep the compiler from discarding a decoded message.
+    template<typename T>
+    inline void doNotOptimize(const T& value)
+    {
+        asm volatile("" : : "r"(&value) : "memory");
+    }
+
+    struct NoOpHandler
+    {
+        template<typename Msg>
+        void operator()(const Msg& msg) const
+        {
+            doNotOptimize(msg);
+        }
+    };
+
+    struct BenchType
+    {
+        const char* name;
+        schema::MessageType type;
+    };
+
+    constexpr BenchType benchTypes[] = {
+"""
+        for s in self.layout.structs:
+            body += f'{2*self.tab}{{"{s.name}", schema::MessageType::{s.name}}},\n'
+        body += """    };
+
+    template<typename F>
+    double bestSeconds(int repeat, F&& f)
+    {
+        double best = 1e300;
+        for (int i = 0; i < repeat; ++i) {
+            const auto start = std::chrono::steady_clock::now();
+            f();
+            const std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+            best = std::min(best, elapsed.count());
+        }
+        return best;
+    }
+
+    void report(const char* label, size_t count, double seconds)
+    {
+        std::printf("%-40s %12zu %14.0f %10.2f\\n", label, count, count / seconds, seconds * 1e9 / count);
+    }
+
+    // Copy the frames of one message type into a buffer of their own.
+    std::vector<char> framesOf(const char* buf, size_t len, schema::MessageType type)
+    {
+        std::vector<char> out;
+        schema::ForEachFrame(buf, len, [&](const char* msg, size_t size) {
+            if (size > 0 && schema::MessageType(msg[0]) == type)
+                out.insert(out.end(), msg - 2, msg + size);
+        });
+        return out;
+    }
+}
+
+int main(int argc, char** argv)
+{
+    if (argc < 2) {
+        std::fprintf(stderr, "usage: %s FILE [REPEAT]\\n", argv[0]);
+        return 2;
+    }
+    const int repeat = argc > 2 ? std::max(1, std::atoi(argv[2])) : 5;
+
+    const int fd = open(argv[1], O_RDONLY);
+    struct stat st;
+    if (fd < 0 || fstat(fd, &st) != 0) {
+        std::perror(argv[1]);
+        return 1;
+    }
+    const size_t len = static_cast<size_t>(st.st_size);
+    void* mapped = len ? mmap(nullptr, len, PROT_READ, MAP_PRIVATE, fd, 0) : nullptr;
+    if (mapped == MAP_FAILED) {
+        std::perror("mmap");
+        return 1;
+    }
+    const char* buf = static_cast<const char*>(mapped);
+
+    std::printf("%-40s %12s %14s %10s\\n", "message", "count", "msgs/sec", "ns/msg");
+    schema::BufferResult result{};
+    const double total = bestSeconds(repeat, [&] { result = schema::parseBuffer(buf, len, NoOpHandler{}); });
+    if (result.frames)
+        report("total", result.frames, total);
+
+    for (const BenchType& bench : benchTypes) {
+        const std::vector<char> frames = framesOf(buf, len, bench.type);
+        const double seconds = bestSeconds(repeat, [&] {
+            result = schema::parseBuffer(frames.data(), frames.size(), NoOpHandler{});
+        });
+        if (result.frames)
+            report(bench.name, result.frames, seconds);
+    }
+
+    if (mapped)
+        munmap(mapped, len);
+    close(fd);
+    return 0;
+}
+"""
+        return body
+
+    def _gen_parse_view(self):
+        """ generate parseView, dispatching to handlers of message views """
+        body = """
+    template<typename View, typename Handler>
+    ParseStatus parseAsView(const char* buf, size_t len, Handler&& handler)
+    {
+        if (len < View::size)
+            return ParseStatus::Truncated;
+        if (len > View::size)
+            return ParseStatus::Oversized;
+        handler(View(buf));
+        return ParseStatus::OK;
+    };
+
+    template<typename Handler>
+    ParseStatus parseView(const char* msg, size_t len, Handler&& handler)
     {
         if (len < 1)
             return ParseStatus::Truncated;
         switch (MessageType(msg[0])) {
 """
-        for s in self.structs:
+        for s in self.layout.structs:
             body += textwrap.indent(f"case MessageType::{s.name}:\n", 2*self.tab)
-            body += textwrap.indent(f"return parseAs<{s.name}>(msg, len, std::forward<Handler>(handler));\n", 3*self.tab)
+            body += textwrap.indent(f"return parseAsView<{s.name}View>(msg, len, std::forward<Handler>(handler));\n", 3*self.tab)
         body += """        default:
             return ParseStatus::UnknownMessageType;
         }
-    }"""
-        return header + body + self.footer
+    }
+"""
+        return body
+
+
+def build_outputs(data, targets, no_cache=False, **options):
+    """ outputs (bytes) of each role in targets, as ItchCompiler(**options)
+    .compile_outputs returns them, reusing cached outputs unless no_cache
+    """
+    # a built library also depends on the compiler that built it
+    cxx = cxx_identity() if "shared_lib" in targets else None
+    key = output_key(data, targets=targets, cxx=cxx, **options)
+    outputs = None if no_cache else load_outputs(key, targets)
+    if outputs is None:
+        outputs = ItchCompiler(**options).compile_outputs(data, targets)
+        save_outputs(key, outputs)
+    return outputs
+
+
+def load_message_types(path):
+    """ message_types mapping (struct name to message_type character) read
+    from the JSON object in the file at path
+    """
+    with open(path) as f:
+        types = json.load(f)
+    if not isinstance(types, dict) or not all(isinstance(t, str) and len(t) == 1 for t in types.values()):
+        raise ValueError(f"{path}: message types must map struct names to single characters")
+    return types
+
+
+def schema_namespace(path):
+    """ C++ namespace of the outputs of the schema at path, after its file name """
+    name = re.sub(r"\W", "_", os.path.splitext(os.path.basename(path))[0])
+    return name if name[:1].isalpha() else "itch_" + name
+
+
+def find_schemas(sources):
+    """ expand directories (to the .itch files in them) and glob patterns """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            matches = sorted(glob.glob(os.path.join(source, "*.itch")))
+        else:
+            matches = sorted(glob.glob(source))
+        if not matches:
+            raise click.BadParameter(f"no .itch files match {source!r}", param_hint="SOURCES")
+        paths += [m for m in matches if m not in paths]
+    return paths
+
 
+def message_types_path(path):
+    """ path of the NAME.types.json sidecar of the schema NAME.itch at path """
+    return os.path.splitext(path)[0] + ".types.json"
 
-@click.command()
+
+def _compile_schema(path, out_dir, python, descriptor_out, no_cache, options):
+    if os.path.exists(message_types_path(path)):
+        options = dict(options, message_types=load_message_types(message_types_path(path)))
+    namespace = schema_namespace(path)
+    directory = os.path.join(out_dir, namespace)
+    os.makedirs(directory, exist_ok=True)
+    # headers are named relative to each other, so they include one another
+    # from the same directory
+    targets = {"enums": "enums.h", "structs": "structs.h", "parser": "parser.h"}
+    if python:
+        targets["python"] = f"{namespace}.py"
+    if descriptor_out:
+        targets["descriptor"] = f"{namespace}.json"
+    with open(path) as f:
+        data = f.read()
+    outputs = build_outputs(data, targets, no_cache, namespace=namespace, **options)
+    return [
+        name for role, name in targets.items() if write_if_changed(os.path.join(directory, name), outputs[role])
+    ]
+
+
+@click.group()
+def cli():
+    """Compile ITCH specification files"""
+
+
+@cli.command()
 @click.argument('itch', type=click.File('r'))
-@click.argument('enums', type=click.File('w'))
-@click.argument('structs', type=click.File('w'))
-@click.argument('parser', type=click.File('w'))
-def compile(itch, enums, structs, parser):
-    """Generate C++ ITCH parser from itch specification file"""
-    data = itch.read()
-    comp = ItchCompiler()
-    enums_str, structs_str, parser_str = comp.compile(data, enums, structs)
-    enums.write(enums_str)
-    structs.write(structs_str)
-    parser.write(parser_str)
+@click.argument('enums', type=click.Path(dir_okay=False))
+@click.argument('structs', type=click.Path(dir_okay=False))
+@click.argument('parser', type=click.Path(dir_okay=False))
+@click.option('--python', 'python_out', type=click.Path(dir_okay=False), help='Also write a Python decoder module.')
+@click.option('--descriptor', 'descriptor_out', type=click.Path(dir_okay=False),
+              help='Also write a JSON schema descriptor, loadable without sly.')
+@click.option('--views', is_flag=True, help='Also generate zero-copy message views and parseView.')
+@click.option('--dispatch', type=click.Choice(ItchCompiler.dispatch_modes), default='switch', show_default=True,
+              help='How parse() dispatches on the message type.')
+@click.option('--namespace', default='itchpy', show_default=True, help='C++ namespace of the generated code.')
+@click.option('--bench', type=click.Path(dir_okay=False),
+              help='Also write bench.cpp, a standalone throughput benchmark of the parser.')
+@click.option('--shared-lib', type=click.Path(dir_okay=False),
+              help='Also build the parser into a shared library with a C ABI for itchpy.native.')
+@click.option('--message-types', type=click.Path(exists=True, dir_okay=False),
+              help='JSON object mapping struct names to their message type character, instead of ITCH 5.0\'s.')
+@click.option('--no-cache', is_flag=True, help='Regenerate the outputs instead of reusing cached ones.')
+def compile(
+    itch, enums, structs, parser, python_out, descriptor_out, views, dispatch, namespace, bench, shared_lib,
+    message_types, no_cache
+):
+    """Generate C++ ITCH parser from itch specification file
+
+    Every struct needs a message type character, from ITCH 5.0 or
+    --message-types.  Outputs are cached by a hash of the schema, compiler
+    and options, and files whose contents would not change are not rewritten.
+    """
+    targets = {
+        "enums": enums,
+        "structs": structs,
+        "parser": parser,
+        "python": python_out,
+        "descriptor": descriptor_out,
+        "bench": bench,
+        "shared_lib": shared_lib,
+    }
+    targets = {role: path for role, path in targets.items() if path is not None}
+    try:
+        if message_types is not None:
+            message_types = load_message_types(message_types)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--message-types")
+    try:
+        outputs = build_outputs(
+            itch.read(), targets, no_cache, views=views, dispatch=dispatch, namespace=namespace,
+            message_types=message_types,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for role, path in targets.items():
+        write_if_changed(path, outputs[role])
+
+
+@cli.command()
+@click.argument('sources', nargs=-1, required=True)
+@click.option('-o', '--out-dir', type=click.Path(file_okay=False), default='.', show_default=True,
+              help='Directory receiving one subdirectory of outputs per schema.')
+@click.option('-j', '--jobs', type=int, help='Worker processes (default: one per CPU).')
+@click.option('--python', is_flag=True, help='Also write a Python decoder module per schema.')
+@click.option('--descriptor', 'descriptor_out', is_flag=True, help='Also write a JSON schema descriptor per schema.')
+@click.option('--views', is_flag=True, help='Also generate zero-copy message views and parseView.')
+@click.option('--dispatch', type=click.Choice(ItchCompiler.dispatch_modes), default='switch', show_default=True,
+              help='How parse() dispatches on the message type.')
+@click.option('--message-types', type=click.Path(exists=True, dir_okay=False),
+              help='JSON object mapping struct names to their message type character, instead of ITCH 5.0\'s.')
+@click.option('--no-cache', is_flag=True, help='Regenerate the outputs instead of reusing cached ones.')
+def batch(sources, out_dir, jobs, python, descriptor_out, views, dispatch, message_types, no_cache):
+    """Compile many specification files in parallel
+
+    SOURCES are .itch files, glob patterns or directories of .itch files.
+    Each schema NAME.itch is compiled into OUT_DIR/NAME/ in C++ namespace
+    NAME, with the message types of NAME.types.json next to it when that
+    exists, else of --message-types, else of ITCH 5.0.  The parser tables
+    are built (or loaded from the table cache) in this process before the
+    pool starts, so workers reuse them.
+    """
+    paths = find_schemas(sources)
+    namespaces = [schema_namespace(p) for p in paths]
+    clashes = sorted({ns for ns in namespaces if namespaces.count(ns) > 1})
+    if clashes:
+        raise click.UsageError(f"several schemas map to namespace(s) {', '.join(clashes)}")
+
+    options = {"views": views, "dispatch": dispatch}
+    try:
+        if message_types is not None:
+            options["message_types"] = load_message_types(message_types)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--message-types")
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = [pool.submit(_compile_schema, p, out_dir, python, descriptor_out, no_cache, options) for p in paths]
+        for path, namespace, future in zip(paths, namespaces, futures):
+            try:
+                written = future.result()
+            except ValueError as e:
+                raise click.ClickException(f"{path}: {e}")
+            click.echo(f"{path} -> {os.path.join(out_dir, namespace)} ({len(written)} written)")
 
 
 if __name__ == "__main__":
-    compile()
\ No newline at end of file
+    cli()
@@ -0,0 +1,92 @@
+"""Layout analysis of a parsed ITCH specification.
+
+Turns an itch_ast.FileAST into a small IR with the byte offset, wire size
+and native size of every field and the total size of every message, for the
+code generators to consume instead of re-deriving it from the declarations.
+"""
+from collections import namedtuple
+
+from .itch_types import MESSAGE_TYPES, TYPES
+
+# type is the itch_types.ItchType of the field
+FieldLayout = namedtuple("FieldLayout", ["name", "type", "offset", "wire_size", "native_size"])
+
+# message_type is the struct's message_type character
+StructLayout = namedtuple(
+    "StructLayout", ["name", "message_type", "fields", "wire_size", "native_size"]
+)
+
+# header holds the leading fields shared, with the same name and type, by
+# every struct
+SchemaLayout = namedtuple("SchemaLayout", ["structs", "header"])
+
+
+class LayoutPass(object):
+    """Computes layouts using the same visitor pattern as CPPGenerator, with
+    each visit method returning the layout of its node.
+    """
+
+    def __init__(self, message_types=None):
+        """message_types maps struct names to their message_type character and
+        defaults to the ITCH 5.0 assignments.  Visiting a FileAST raises
+        ValueError unless it maps every struct to a distinct character.
+        """
+        self.message_types = MESSAGE_TYPES if message_types is None else message_types
+
+    def visit(self, node):
+        method = "visit_" + node.__class__.__name__
+        return getattr(self, method, self.generic_visit)(node)
+
+    def generic_visit(self, node):
+        return None
+
+    def visit_ID(self, n):
+        return TYPES[n.name]
+
+    def visit_FileAST(self, n):
+        structs = []
+        for decl in n.decls:
+            layout = self.visit(decl)
+            if isinstance(layout, StructLayout):
+                structs.append(layout)
+        self._check_message_types(structs)
+        return SchemaLayout(structs, self._common_prefix(structs))
+
+    def visit_Struct(self, n):
+        fields = []
+        wire_size = native_size = 0
+        for f in n.fields or []:
+            t = self.visit(f.type)
+            fields.append(FieldLayout(f.name, t, wire_size, t.wire_size, t.native_size))
+            wire_size += t.wire_size
+            native_size += t.native_size
+        return StructLayout(
+            n.name, self.message_types.get(n.name), fields, wire_size, native_size
+        )
+
+    def _check_message_types(self, structs):
+        unknown = [s.name for s in structs if s.message_type is None]
+        if unknown:
+            raise ValueError(f"no message_type for struct(s) {', '.join(unknown)}")
+        names = {}
+        for s in structs:
+            names.setdefault(s.message_type, []).append(s.name)
+        shared = [f"{', '.join(n)} ({t!r})" for t, n in names.items() if len(n) > 1]
+        if shared:
+            raise ValueError(f"struct(s) sharing a message_type: {'; '.join(shared)}")
+
+    def _common_prefix(self, structs):
+        if not structs:
+            return []
+        prefix = []
+        for fields in zip(*(s.fields for s in structs)):
+            first = fields[0]
+            if any((f.name, f.type) != (first.name, first.type) for f in fields):
+                break
+            prefix.append(first)
+        return prefix
+
+
+def compute_layout(ast, message_types=None):
+    """Return the SchemaLayout of a parsed specification"""
+    return LayoutPass(message_types).visit(ast)
@@ -0,0 +1,71 @@
+"""ctypes bindings to a decoder library built by ``itchc --shared-lib``.
+
+The library exposes a C ABI that decodes a buffer of length-prefixed frames
+into caller-provided arrays of packed, native byte order records, one array
+per message type.  Calls go through ctypes.CDLL, which releases the GIL, so
+several threads can decode at once.
+"""
+import ctypes
+import os
+
+import numpy as np
+
+from .columnar import native_dtype
+
+
+class Column(ctypes.Structure):
+    """Mirror of the library's itchpy_column"""
+
+    _fields_ = [
+        ("records", ctypes.c_void_p),
+        ("capacity", ctypes.c_size_t),
+        ("count", ctypes.c_size_t),
+    ]
+
+
+class NativeDecoder(object):
+    """Decodes buffers with a shared library into the same arrays as
+    columnar.decode_columns, given the wire dtypes of a generated module.
+    """
+
+    def __init__(self, path, dtypes):
+        self.lib = ctypes.CDLL(os.fspath(path))
+        self.lib.itchpy_record_size.argtypes = [ctypes.c_ubyte]
+        self.lib.itchpy_record_size.restype = ctypes.c_size_t
+        self.lib.itchpy_count.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.POINTER(ctypes.c_size_t)]
+        self.lib.itchpy_count.restype = None
+        self.lib.itchpy_decode.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.POINTER(Column),
+            ctypes.POINTER(ctypes.c_size_t),
+        ]
+        self.lib.itchpy_decode.restype = ctypes.c_size_t
+
+        self.dtypes = {}
+        for type_byte, dtype in dtypes.items():
+            native = native_dtype(dtype)
+            if self.lib.itchpy_record_size(type_byte) != native.itemsize:
+                raise ValueError(f"library does not match the layout of message type {chr(type_byte)!r}")
+            self.dtypes[type_byte] = native
+
+    def decode_columns(self, buf):
+        """Decode every frame in buf whose type is a key of the dtypes into one
+        structured array per type, in the order they appear in buf.
+        """
+        data = np.frombuffer(buf, dtype=np.uint8)
+        address = data.ctypes.data
+        counts = (ctypes.c_size_t * 256)()
+        self.lib.itchpy_count(address, len(data), counts)
+
+        columns = (Column * 256)()
+        arrays = {}
+        for type_byte, dtype in self.dtypes.items():
+            arrays[type_byte] = np.empty(counts[type_byte], dtype=dtype)
+            columns[type_byte] = Column(arrays[type_byte].ctypes.data, counts[type_byte], 0)
+
+        malformed = ctypes.c_size_t()
+        self.lib.itchpy_decode(address, len(data), columns, ctypes.byref(malformed))
+        if malformed.value:
+            raise ValueError(f"{malformed.value} messages do not match the wire length of their type")
+        return {type_byte: array[: columns[type_byte].count] for type_byte, array in arrays.items()}
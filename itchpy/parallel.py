@@ -0,0 +1,118 @@
+"""Multi-process columnar decoding of a single ITCH file.
+
+The file is cut into chunks that start and end exactly on frame boundaries,
+found either from its FrameIndex or by resynchronising on the expected wire
+length of each message type.  Every worker maps the file itself and decodes
+its own byte range, so only the (start, end) pair and the resulting arrays
+cross process boundaries.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .columnar import decode_columns, native_dtype
+from .reader import PREFIX_SIZE, ItchFile
+
+# frames that must chain together for resync() to accept a boundary
+RESYNC_DEPTH = 8
+
+# bytes resync() may scan for a boundary before giving up; a frame is at most
+# PREFIX_SIZE + 65535 bytes, so a boundary is always found well within this
+# when every message type in the file is known
+RESYNC_LIMIT = 1 << 20
+
+
+def _chains(mv, pos, end, wire_lengths, depth):
+    for _ in range(depth):
+        if pos == end:
+            return True
+        if pos + PREFIX_SIZE >= end:
+            return False
+        length = mv[pos] << 8 | mv[pos + 1]
+        if wire_lengths.get(mv[pos + PREFIX_SIZE]) != length:
+            return False
+        pos += PREFIX_SIZE + length
+    return pos <= end
+
+
+def resync(buf, pos, wire_lengths, depth=RESYNC_DEPTH, limit=RESYNC_LIMIT):
+    """Return the first frame boundary at or after pos.
+
+    A position is taken to be a boundary when the next depth frames (or all
+    frames up to the end of buf) each carry a known message_type byte whose
+    wire length, from wire_lengths, matches their length prefix, so
+    wire_lengths must cover every message type in buf, as the generated
+    WIRE_LENGTHS does.  Returns len(buf) if the end of buf is reached first;
+    raises ValueError if no boundary is found within limit bytes of pos.
+    """
+    mv = memoryview(buf).cast("B")
+    end = len(mv)
+    stop = min(end, pos + limit)
+    start = pos
+    while pos < stop:
+        if _chains(mv, pos, end, wire_lengths, depth):
+            return pos
+        pos += 1
+    if stop < end:
+        raise ValueError(
+            f"no frame boundary within {limit} bytes of offset {start}; pass wire_lengths "
+            "for every message type in the file (the generated WIRE_LENGTHS) or a FrameIndex"
+        )
+    return end
+
+
+def split_chunks(buf, n, wire_lengths=None, index=None):
+    """Cut buf into at most n (start, end) byte ranges on frame boundaries.
+
+    Boundaries come from index when given, otherwise from resync() with
+    wire_lengths, which must then hold the length of every message type in
+    buf.
+    """
+    end = len(buf)
+    if index is not None:
+        starts = index.offsets.astype(np.int64) - PREFIX_SIZE
+        cuts = [int(starts[len(starts) * i // n]) for i in range(1, n) if len(starts)]
+    else:
+        cuts = [resync(buf, end * i // n, wire_lengths) for i in range(1, n)]
+    bounds = sorted(set([0] + cuts + [end]))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _decode_chunk(path, start, end, dtypes):
+    with ItchFile(path) as f:
+        chunk = f.buffer[start:end]
+        try:
+            return decode_columns(chunk, dtypes)
+        finally:
+            chunk.release()
+
+
+def decode_parallel(path, dtypes, workers=None, index=None, wire_lengths=None):
+    """Decode the ITCH file at path into one structured array per key of
+    dtypes, like columnar.decode_columns, spreading the work over a pool of
+    worker processes.
+
+    Chunk boundaries come from index, an optional FrameIndex of the file, or
+    else by resynchronising on wire_lengths, the wire length of every message
+    type (the generated WIRE_LENGTHS).  Without either they are derived from
+    the itemsize of each dtype, which only works when dtypes covers every
+    message type in the file; otherwise resync() raises ValueError.
+    """
+    workers = workers or os.cpu_count() or 1
+    if wire_lengths is None:
+        wire_lengths = {type_byte: dtype.itemsize for type_byte, dtype in dtypes.items()}
+    with ItchFile(path) as f:
+        chunks = split_chunks(f.buffer, workers, wire_lengths, index)
+
+    if len(chunks) <= 1:
+        results = [_decode_chunk(path, start, end, dtypes) for start, end in chunks]
+    else:
+        with ProcessPoolExecutor(min(workers, len(chunks))) as pool:
+            futures = [pool.submit(_decode_chunk, path, start, end, dtypes) for start, end in chunks]
+            results = [future.result() for future in futures]
+
+    return {
+        type_byte: np.concatenate([r[type_byte] for r in results] or [np.empty(0, native_dtype(dtype))])
+        for type_byte, dtype in dtypes.items()
+    }
@@ -1,7 +1,9 @@
 from sly import Parser
+from sly.yacc import YaccError
 
-from lexer import ITCHLexer
-import itch_ast as i_ast
+from .lexer import ITCHLexer
+from . import itch_ast as i_ast
+from . import parsetab
 
 class ITCHParser(Parser):
     # builds an AST
@@ -14,6 +16,34 @@ class ITCHParser(Parser):
     def __init__(self):
         self.errors = []
 
+    # sly internals _build relies on, as of the pinned sly 0.4
+    _sly_hooks = ("_Parser__validate_specification", "_Parser__build_grammar", "_Parser__build_lrtables")
+
+    @classmethod
+    def _build(cls, definitions):
+        """ build the grammar as sly does, but take the LALR tables from the
+        parsetab cache when they were already computed for this grammar.
+        Falls back to sly's own build when a debugfile is requested or sly no
+        longer has the internals used here.
+        """
+        if cls.debugfile or not all(hasattr(cls, hook) for hook in cls._sly_hooks):
+            # sly skips building classes that define _build themselves
+            if "_build" in vars(cls):
+                delattr(cls, "_build")
+            Parser._build.__func__(cls, definitions)
+            return
+
+        rules = [(name, value) for name, value in definitions if callable(value) and hasattr(value, "rules")]
+        if not cls._Parser__validate_specification():
+            raise YaccError("Invalid parser specification")
+        cls._Parser__build_grammar(rules)
+
+        key = parsetab.grammar_hash(cls._grammar, cls.tokens)
+        cls._lrtable = parsetab.load_tables(key)
+        if cls._lrtable is None:
+            cls._Parser__build_lrtables()
+            parsetab.save_tables(key, cls._lrtable)
+
     # Grammar rules and actions
     @_("translation_unit")
     def translation_unit_or_empty(self, p):
@@ -0,0 +1,86 @@
+"""On-disk cache of the LALR tables of a sly Parser.
+
+sly builds a parser's tables in its metaclass, i.e. every time the module
+defining it is imported.  The action, goto and defaulted-state tables are
+saved as JSON under a key hashing the grammar productions, precedence,
+tokens and sly version, and reused until any of them changes.  The cache
+lives in $ITCHPY_CACHE_DIR, defaulting to $XDG_CACHE_HOME/itchpy (or
+~/.cache/itchpy); a cache that cannot be read or written is ignored.
+"""
+import hashlib
+import json
+import os
+
+import sly
+
+# bumped whenever the cache layout changes
+CACHE_VERSION = 1
+
+
+class CachedTables(object):
+    """The parts of sly's LRTable used while parsing"""
+
+    def __init__(self, lr_action, lr_goto, defaulted_states):
+        self.lr_action = lr_action
+        self.lr_goto = lr_goto
+        self.defaulted_states = defaulted_states
+
+
+def cache_root():
+    """Directory holding itchpy's caches"""
+    root = os.environ.get("ITCHPY_CACHE_DIR")
+    if root is None:
+        root = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "itchpy")
+    return root
+
+
+def cache_dir():
+    return os.path.join(cache_root(), f"lalr-v{CACHE_VERSION}")
+
+
+def grammar_hash(grammar, tokens):
+    """Hash of everything the tables of grammar are computed from"""
+    h = hashlib.sha256(f"sly {sly.__version__}\n".encode())
+    h.update(" ".join(sorted(tokens)).encode() + b"\n")
+    for p in grammar.Productions:
+        h.update(f"{p} {p.prec}\n".encode())
+    return h.hexdigest()
+
+
+def _int_keys(table):
+    return {int(state): row for state, row in table.items()}
+
+
+def load_tables(key):
+    """Return the CachedTables saved under key, or None"""
+    path = os.path.join(cache_dir(), f"{key}.json")
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if data["key"] != key:
+            return None
+        return CachedTables(
+            _int_keys(data["action"]), _int_keys(data["goto"]), _int_keys(data["defaulted_states"])
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_tables(key, lrtable):
+    """Save the tables of a sly LRTable under key"""
+    directory = cache_dir()
+    path = os.path.join(directory, f"{key}.json")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    data = {
+        "key": key,
+        "action": lrtable.lr_action,
+        "goto": lrtable.lr_goto,
+        "defaulted_states": lrtable.defaulted_states,
+    }
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
@@ -0,0 +1,194 @@
+from .itch_types import TYPES
+from .layout import LayoutPass
+
+
+class PyGenerator(object):
+    """Generates a Python decoder module from an ITCH specification.
+
+    Uses the same visitor pattern as CPPGenerator.  Every struct becomes a
+    namedtuple, a precompiled big-endian struct.Struct, a decode function, a
+    numpy structured dtype of its wire layout and a lazy view class; the
+    module ends with dispatch tables keyed on the message_type byte.  All of it is built once, when the
+    generated module is imported.
+    """
+
+    header = "# Generated by itchpy from an ITCH specification.  Do not edit.\n"
+    tab = "    "
+
+    def __init__(self, message_types=None):
+        """Constructs Python generator
+
+        message_types is passed on to layout.LayoutPass.
+        """
+        self.layout_pass = LayoutPass(message_types)
+
+    def visit(self, node):
+        method = "visit_" + node.__class__.__name__
+        return getattr(self, method, self.generic_visit)(node)
+
+    def generic_visit(self, node):
+        if node is None:
+            return ""
+        else:
+            return "".join(self.visit(c) for c_name, c in node.children())
+
+    def visit_ID(self, n):
+        return n.name
+
+    def visit_FileAST(self, n):
+        s = self.header
+        s += "import struct\nfrom collections import namedtuple\n\n"
+        s += "import numpy as np\n\n"
+        s += "from itchpy import columnar as _columnar\n"
+        s += "from itchpy import reader as _reader\n\n"
+        s += "# big-endian readers of the primitive types, used by the views\n"
+        for t in TYPES.values():
+            s += f"_{t.name} = struct.Struct('>{t.struct_format}')\n"
+        for decl in n.decls:
+            code = self.visit(decl)
+            if code:
+                s += "\n\n" + code
+        layout = self.layout_pass.visit(n)
+        s += "\n\n" + self._generate_dispatch(layout.structs)
+        if layout.header:
+            s += "\n\n" + self._generate_header_scan(layout.header)
+        s += "\n\n" + self._generate_filter(layout.header)
+        return s
+
+    def visit_Enum(self, n):
+        # enums carry no wire layout of their own
+        return ""
+
+    def visit_Struct(self, n):
+        layout = self.layout_pass.visit(n)
+        name, fields = layout.name, layout.fields
+        names = [f.name for f in fields]
+        fmt = ">" + "".join(f.type.struct_format for f in fields)
+
+        s = f"{name} = namedtuple(\n"
+        s += f"{self.tab}{name!r}, {names!r}\n)\n"
+        s += f"_{name} = struct.Struct({fmt!r})\n"
+        s += self._generate_dtype(f"{name}_dtype", fields) + "\n\n"
+        s += self._generate_decoder(name, fields) + "\n\n"
+        s += self._generate_view(name, fields)
+        return s
+
+    def _generate_dtype(self, var, fields):
+        """Generate var, the packed numpy layout of the fields' wire bytes"""
+        s = f"{var} = np.dtype(\n{self.tab}[\n"
+        for f in fields:
+            s += f"{self.tab * 2}({f.name!r}, {f.type.wire_dtype!r}),\n"
+        s += f"{self.tab}]\n)\n"
+        return s
+
+    def _generate_decoder(self, name, fields):
+        """Generate decode_<name>, binding everything it needs as defaults so
+        the hot path touches only fast locals.
+        """
+        wide = [f.name for f in fields if f.type.name == "time"]
+        if not wide:
+            s = f"def decode_{name}(buf, offset=0, _unpack=_{name}.unpack_from, _make={name}._make):\n"
+            s += f"{self.tab}return _make(_unpack(buf, offset))\n"
+            return s
+
+        unpacked = []
+        values = []
+        for f in fields:
+            if f.name in wide:
+                unpacked += [f"{f.name}_hi", f"{f.name}_lo"]
+                values.append(f"{f.name}_hi << 32 | {f.name}_lo")
+            else:
+                unpacked.append(f.name)
+                values.append(f.name)
+        s = f"def decode_{name}(buf, offset=0, _unpack=_{name}.unpack_from, _new={name}):\n"
+        s += f"{self.tab}{', '.join(unpacked)} = _unpack(buf, offset)\n"
+        s += f"{self.tab}return _new({', '.join(values)})\n"
+        return s
+
+    def _generate_view(self, name, fields):
+        """Generate <name>View, a re-pointable flyweight over a buffer whose
+        properties decode their field only when read.
+        """
+        s = f"class {name}View(object):\n"
+        s += f'{self.tab}"""Lazy view of a {name} in a buffer"""\n\n'
+        s += f'{self.tab}__slots__ = ("buf", "offset")\n\n'
+        s += f"{self.tab}def __init__(self, buf=None, offset=0):\n"
+        s += f"{self.tab * 2}self.buf = buf\n"
+        s += f"{self.tab * 2}self.offset = offset\n\n"
+        s += f"{self.tab}def point(self, buf, offset=0):\n"
+        s += f'{self.tab * 2}"""Re-point the view at the message starting at offset in buf"""\n'
+        s += f"{self.tab * 2}self.buf = buf\n"
+        s += f"{self.tab * 2}self.offset = offset\n"
+        s += f"{self.tab * 2}return self\n\n"
+        s += f"{self.tab}def decode(self):\n"
+        s += f"{self.tab * 2}return decode_{name}(self.buf, self.offset)\n"
+        for f in fields:
+            at = f"self.offset + {f.offset}" if f.offset else "self.offset"
+            s += f"\n{self.tab}@property\n"
+            s += f"{self.tab}def {f.name}(self, _unpack=_{f.type.name}.unpack_from):\n"
+            if f.type.name == "time":
+                s += f"{self.tab * 2}hi, lo = _unpack(self.buf, {at})\n"
+                s += f"{self.tab * 2}return hi << 32 | lo\n"
+            else:
+                s += f"{self.tab * 2}return _unpack(self.buf, {at})[0]\n"
+        return s
+
+    def _generate_header_scan(self, prefix):
+        s = "# fields every message starts with\n"
+        s += self._generate_dtype("HEADER_DTYPE", prefix)
+        s += "\n\n"
+        s += "def scan_headers(buf, index=None):\n"
+        s += f'{self.tab}"""Decode only the shared message header of every frame in buf, one array per field,\n'
+        s += f'{self.tab}reusing the FrameIndex of buf when given."""\n'
+        s += f"{self.tab}return _columnar.scan_headers(buf, HEADER_DTYPE, index)\n"
+        return s
+
+    def _generate_filter(self, prefix):
+        """Generate iter_messages, which filters frames on the raw bytes of
+        the stock_locate and timestamp header fields when both are shared.
+        """
+        fields = {f.name: f"({f.offset}, _{f.type.name})" for f in prefix}
+        s = "# (offset, reader) of the header fields iter_messages filters on\n"
+        s += f"LOCATE_FIELD = {fields.get('stock_locate')}\n"
+        s += f"TIME_FIELD = {fields.get('timestamp')}\n\n\n"
+        s += "def iter_messages(buf, types=None, locates=None, time_range=None, decode=decode):\n"
+        s += f'{self.tab}"""Decode the frames in buf passing the filters of itchpy.reader.iter_filtered,\n'
+        s += f'{self.tab}raising ValueError on a frame whose length differs from WIRE_LENGTHS."""\n'
+        s += f"{self.tab}return _reader.iter_filtered(\n"
+        s += f"{self.tab * 2}buf, decode, types, locates, time_range, LOCATE_FIELD, TIME_FIELD, WIRE_LENGTHS\n"
+        s += f"{self.tab})\n"
+        return s
+
+    def _generate_dispatch(self, structs):
+        s = "# decoders, wire dtypes, view classes and wire lengths keyed on the message_type byte\n"
+        s += "DECODERS = {\n"
+        for n in structs:
+            s += f"{self.tab}ord({n.message_type!r}): decode_{n.name},\n"
+        s += "}\n"
+        s += "DTYPES = {\n"
+        for n in structs:
+            s += f"{self.tab}ord({n.message_type!r}): {n.name}_dtype,\n"
+        s += "}\n"
+        s += "VIEWS = {\n"
+        for n in structs:
+            s += f"{self.tab}ord({n.message_type!r}): {n.name}View,\n"
+        s += "}\n"
+        s += "WIRE_LENGTHS = {\n"
+        for n in structs:
+            s += f"{self.tab}ord({n.message_type!r}): {n.wire_size},\n"
+        s += "}\n\n\n"
+        s += "def decode(buf, offset=0, _decoders=DECODERS):\n"
+        s += f'{self.tab}"""Decode the message starting at offset, or return None if its type is unknown."""\n'
+        s += f"{self.tab}decoder = _decoders.get(buf[offset])\n"
+        s += f"{self.tab}if decoder is None:\n"
+        s += f"{self.tab * 2}return None\n"
+        s += f"{self.tab}return decoder(buf, offset)\n\n\n"
+        s += "def decode_block(buf, _decoders=DECODERS):\n"
+        s += f'{self.tab}"""Decode messages concatenated without length prefixes, stepping by WIRE_LENGTHS."""\n'
+        s += f"{self.tab}for offset, length in _reader.iter_unframed(buf, WIRE_LENGTHS):\n"
+        s += f"{self.tab * 2}yield _decoders[buf[offset]](buf, offset)\n\n\n"
+        s += "def decode_columns(buf, index=None):\n"
+        s += f'{self.tab}"""Decode a buffer of length-prefixed frames into one structured array per message type,\n'
+        s += f'{self.tab}reusing the FrameIndex of buf when given."""\n'
+        s += f"{self.tab}return _columnar.decode_columns(buf, DTYPES, index)\n"
+        return s
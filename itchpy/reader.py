@@ -0,0 +1,197 @@
+"""Zero-copy access to raw ITCH files.
+
+NASDAQ daily files are a sequence of frames, each a 2 byte big-endian payload
+length followed by the payload.  ItchFile memory-maps such a file and hands
+out memoryview slices of it, so no message is ever copied into a fresh bytes
+object.
+"""
+import mmap
+import os
+
+# bytes taken by the length prefix of every frame
+PREFIX_SIZE = 2
+
+
+def iter_spans(buf, start=0, end=None):
+    """Yield (offset, length) of the payload of every complete frame in
+    buf[start:end].  start must lie on a frame boundary.
+    """
+    mv = memoryview(buf).cast("B")
+    end = len(mv) if end is None else end
+    pos = start
+    while pos + PREFIX_SIZE <= end:
+        length = mv[pos] << 8 | mv[pos + 1]
+        pos += PREFIX_SIZE
+        if pos + length > end:
+            return
+        yield pos, length
+        pos += length
+
+
+def iter_unframed(buf, wire_lengths, start=0, end=None):
+    """Yield (offset, length) of every message in buf[start:end] when messages
+    are concatenated without length prefixes, as in MoldUDP payloads, using
+    wire_lengths (message_type byte to length) to step over each one.
+
+    Stops at a trailing partial message; raises ValueError on a message type
+    missing from wire_lengths, since the stream cannot be resynchronised.
+    """
+    mv = memoryview(buf).cast("B")
+    end = len(mv) if end is None else end
+    pos = start
+    while pos < end:
+        length = wire_lengths.get(mv[pos])
+        if length is None:
+            raise ValueError(f"unknown message type {chr(mv[pos])!r} at offset {pos}")
+        if pos + length > end:
+            return
+        yield pos, length
+        pos += length
+
+
+def _type_bytes(types):
+    return {ord(t) if isinstance(t, (str, bytes)) else t for t in types}
+
+
+def check_length(mv, offset, length, wire_lengths):
+    """Raise ValueError if the frame at offset is not exactly the wire length
+    of its message type; types missing from wire_lengths are not checked.
+    """
+    expected = wire_lengths.get(mv[offset])
+    if expected is not None and expected != length:
+        raise ValueError(
+            f"message of type {chr(mv[offset])!r} at offset {offset} has length {length}, expected {expected}"
+        )
+
+
+def iter_filtered(
+    buf, decode, types=None, locates=None, time_range=None, locate=None, timestamp=None, wire_lengths=None
+):
+    """Yield decode(buf, offset) for the frames in buf that pass every filter.
+
+    Filters are checked against the raw bytes, so rejected frames are never
+    decoded:
+      types:      message types to keep, as characters or byte values
+      locates:    stock_locate values to keep
+      time_range: (start, end) nanoseconds, keeping start <= timestamp < end
+    locate and timestamp give the (offset, struct.Struct) of the stock_locate
+    and 48 bit timestamp header fields, as generated for the schema.
+    With wire_lengths (message_type byte to length, the generated
+    WIRE_LENGTHS), a kept frame whose length differs from that of its type
+    raises ValueError rather than being decoded past its end; empty frames
+    are skipped.
+    """
+    # frames too short to hold a filtered field never match
+    min_length = 0
+    if types is not None:
+        types = _type_bytes(types)
+        min_length = 1
+    if locates is not None:
+        if locate is None:
+            raise ValueError("schema has no shared stock_locate field")
+        locates = set(locates)
+        locate_at, locate_unpack = locate[0], locate[1].unpack_from
+        min_length = max(min_length, locate_at + locate[1].size)
+    if time_range is not None:
+        if timestamp is None:
+            raise ValueError("schema has no shared timestamp field")
+        start, stop = time_range
+        time_at, time_unpack = timestamp[0], timestamp[1].unpack_from
+        min_length = max(min_length, time_at + timestamp[1].size)
+
+    mv = memoryview(buf).cast("B")
+    for offset, length in iter_spans(mv):
+        if length < min_length:
+            continue
+        if types is not None and mv[offset] not in types:
+            continue
+        if wire_lengths is not None:
+            if not length:
+                continue
+            check_length(mv, offset, length, wire_lengths)
+        if locates is not None and locate_unpack(mv, offset + locate_at)[0] not in locates:
+            continue
+        if time_range is not None:
+            hi, lo = time_unpack(mv, offset + time_at)
+            if not start <= (hi << 32 | lo) < stop:
+                continue
+        yield decode(mv, offset)
+
+
+class ItchFile(object):
+    """A read-only memory map of a file of length-prefixed ITCH frames.
+
+    Slices handed out by frames() borrow the mapping.  If any are still
+    alive at close(), the mapping is left to be unmapped once the last of
+    them is dropped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # empty files cannot be mapped
+            self._mmap = b""
+        self.buffer = memoryview(self._mmap)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            self.buffer.release()
+            if isinstance(self._mmap, mmap.mmap):
+                self._mmap.close()
+        except BufferError:
+            # slices still borrow the mapping; it is freed with the last one
+            pass
+        self._mmap = self.buffer = None
+        self._file.close()
+
+    @property
+    def address(self):
+        """Address of the first byte of the mapping, for handing frames to
+        native code such as the generated C++ parse(address + offset, length).
+        """
+        import numpy as np
+
+        return np.frombuffer(self.buffer, dtype=np.uint8).ctypes.data
+
+    def spans(self, start=0, end=None):
+        """Yield (offset, length) of every frame payload"""
+        return iter_spans(self.buffer, start, end)
+
+    def frames(self, start=0, end=None):
+        """Yield a memoryview of every frame payload"""
+        buf = self.buffer
+        for offset, length in iter_spans(buf, start, end):
+            yield buf[offset : offset + length]
+
+    def filtered(self, decode, **filters):
+        """Yield decoded frames passing the filters of iter_filtered"""
+        return iter_filtered(self.buffer, decode, **filters)
+
+    def messages(self, decode, start=0, end=None, wire_lengths=None):
+        """Yield decode(buffer, offset) for every frame, e.g. with the decode
+        function of a generated Python module, which gives None for message
+        types it does not know.  Given wire_lengths (the generated
+        WIRE_LENGTHS), frame lengths are checked as by iter_filtered.
+        """
+        buf = self.buffer
+        mv = buf.cast("B") if wire_lengths is not None else None
+        for offset, length in iter_spans(buf, start, end):
+            if wire_lengths is not None:
+                if not length:
+                    continue
+                check_length(mv, offset, length, wire_lengths)
+            yield decode(buf, offset)
@@ -3,7 +3,9 @@ from setuptools import setup
 import versioneer
 
 install_requires = [
-    "sly",
+    "numpy",
+    # ITCHParser._build uses sly internals validated against this release
+    "sly==0.4",
 ]
 
 test_requirements = ["pytest-cov", "pytest-mock", "pytest>=3"]
@@ -28,6 +30,8 @@ setup(
     author_email="givenskevinm@gmail.com",
     packages=packages,
     include_package_data=True,
+    # module __getattr__ (PEP 562) and subprocess.run(capture_output=...)
+    python_requires=">=3.7",
     install_requires=install_requires,
     tests_require=test_requirements,
     license="MIT",
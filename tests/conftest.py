@@ -1,7 +1,22 @@
-import pytest
-from itchpy.lexer import ITCHLexer
-from itchpy.parser import ITCHParser
-from itchpy.cpp_gen import CPPGenerator
+import atexit
+import os
+import shutil
+import subprocess
+import tempfile
+import types
+
+# keep parser table and output caches out of the real home directory; set
+# before itchpy.parser is imported, since its tables are cached on import
+_cache_dir = tempfile.mkdtemp(prefix="itchpy-cache-")
+atexit.register(shutil.rmtree, _cache_dir, ignore_errors=True)
+os.environ["ITCHPY_CACHE_DIR"] = _cache_dir
+
+import pytest  # noqa: E402
+import itchpy  # noqa: E402
+from itchpy.itchc import ItchCompiler  # noqa: E402
+from itchpy.lexer import ITCHLexer  # noqa: E402
+from itchpy.parser import ITCHParser  # noqa: E402
+from itchpy.cpp_gen import CPPGenerator  # noqa: E402
 
 
 @pytest.fixture
@@ -17,3 +32,56 @@ def parser():
 @pytest.fixture
 def generator():
     return CPPGenerator()
+
+
+@pytest.fixture
+def load_module():
+    """Import generated Python source as a throwaway module"""
+
+    def load(source, name="itch_generated"):
+        module = types.ModuleType(name)
+        exec(compile(source, name, "exec"), module.__dict__)
+        return module
+
+    return load
+
+
+@pytest.fixture
+def make_frames():
+    """Join payloads into a buffer of length-prefixed frames"""
+
+    def make(payloads):
+        return b"".join(len(p).to_bytes(2, "big") + p for p in payloads)
+
+    return make
+
+
+@pytest.fixture
+def build_cpp(tmp_path):
+    """Generate C++ headers from a schema next to base.h, then compile and
+    link a main source including them with the local C++ compiler.
+    Returns the path of the program.
+    """
+    cxx = shutil.which("g++") or shutil.which("clang++")
+    if cxx is None:
+        pytest.skip("no C++ compiler available")
+
+    def build(schema, main, flags=(), **options):
+        shutil.copy(os.path.join(os.path.dirname(itchpy.__file__), "base.h"), tmp_path)
+        with open(tmp_path / "enums.h", "w") as enums, open(tmp_path / "structs.h", "w") as structs, open(
+            tmp_path / "parser.h", "w"
+        ) as parser:
+            outputs = ItchCompiler(**options).compile(schema, enums, structs)
+            for f, output in zip((enums, structs, parser), outputs):
+                f.write(output)
+        (tmp_path / "main.cpp").write_text(main)
+        exe = tmp_path / "main"
+        subprocess.run(
+            [cxx, "-std=c++17", "-O2", "-Wall", *flags, "-o", str(exe), str(tmp_path / "main.cpp")],
+            check=True,
+            capture_output=True,
+        )
+        return exe
+
+    build.cxx = cxx
+    return build
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from itchpy import columnar
+
+
+def test_frame_offsets(make_frames):
+    buf = make_frames([b"A", b"BCD", b""]) + b"\x00\x05xy"
+
+    offsets, lengths = columnar.frame_offsets(buf)
+
+    assert offsets.tolist() == [2, 5, 10]
+    assert lengths.tolist() == [1, 3, 0]
+
+
+def test_gather():
+    data = np.frombuffer(b"\x00\x01\x02\x00\x03\x04", dtype=np.uint8)
+    dtype = np.dtype([("a", "u1"), ("b", ">u2")])
+
+    result = columnar.gather(data, [0, 3], dtype)
+
+    assert result.flags.c_contiguous
+    assert result["b"].tolist() == [0x0102, 0x0304]
+    assert len(columnar.gather(data[:2], [], dtype)) == 0
+
+
+def test_decode_columns(make_frames):
+    dtype = np.dtype([("message_type", "S1"), ("value", ">u4")])
+    buf = make_frames([b"A\x00\x00\x00\x01", b"Bzz", b"A\x00\x00\x01\x00"])
+
+    columns = columnar.decode_columns(buf, {ord("A"): dtype, ord("C"): dtype})
+
+    assert columns[ord("A")]["value"].tolist() == [1, 256]
+    assert len(columns[ord("C")]) == 0
+
+
+def test_decode_columns_truncated(make_frames):
+    dtype = np.dtype([("message_type", "S1"), ("value", ">u4")])
+    buf = make_frames([b"A\x00\x01"])
+
+    with pytest.raises(ValueError):
+        columnar.decode_columns(buf, {ord("A"): dtype})
+
+
+def test_widen_time():
+    stamps = [0, 1, 0x0102030405, 0xFFFFFFFFFFFF]
+    raw = np.array([list(t.to_bytes(6, "big")) for t in stamps], dtype=np.uint8)
+
+    result = columnar.widen_time(raw)
+
+    assert result.dtype == np.uint64
+    assert result.tolist() == stamps
+
+
+def test_native_dtype():
+    wire = np.dtype([("a", "S1"), ("b", ">i2"), ("t", "6u1")])
+
+    native = columnar.native_dtype(wire)
+
+    assert native["a"] == np.dtype("S1")
+    assert native["b"] == np.dtype("=i2")
+    assert native["t"] == np.dtype(np.uint64)
+
+
+def test_decode_columns_time(make_frames):
+    dtype = np.dtype([("message_type", "S1"), ("timestamp", "6u1")])
+    buf = make_frames([b"T" + (34200 * 10 ** 9).to_bytes(6, "big")])
+
+    columns = columnar.decode_columns(buf, {ord("T"): dtype})
+
+    assert columns[ord("T")]["timestamp"].dtype == np.uint64
+    assert columns[ord("T")]["timestamp"].tolist() == [34200 * 10 ** 9]
+
+
+def test_decode_columns_oversized(make_frames):
+    dtype = np.dtype([("message_type", "S1"), ("value", ">u4")])
+    buf = make_frames([b"A\x00\x00\x00\x01\x00"])
+
+    with pytest.raises(ValueError, match="length 6, expected 5"):
+        columnar.decode_columns(buf, {ord("A"): dtype})
@@ -1,5 +1,12 @@
+import os
+import subprocess
+from types import SimpleNamespace
+
 import pytest
+from click.testing import CliRunner
 
+import itchpy
+from itchpy import itchc
 from itchpy.itchc import ItchCompiler
 
 @pytest.mark.skip
@@ -35,3 +42,502 @@ pop()
     assert struct_file == struct_output
 
 
+
+SCHEMA = """
+enum EventCode: char {
+    O,
+    S
+}
+struct SystemEventMessage {
+    message_type:char;
+    stock_locate:ushort;
+    tracking_number:short;
+    timestamp:time;
+    event_code:char;
+}
+struct OrderDeleteMessage {
+    message_type:char;
+    stock_locate:ushort;
+    order_reference_number:ulong;
+    price:long;
+    score:double;
+}
+"""
+
+
+def test_compiler_endian_swap(tmp_path):
+    with open(tmp_path / "enums.h", "w") as enums, open(tmp_path / "structs.h", "w") as structs:
+        _, struct_file, _ = ItchCompiler().compile(SCHEMA, enums, structs)
+
+    assert "inline void EndianSwap(SystemEventMessage& msg)\n" in struct_file
+    assert "  msg.stock_locate = ITCHPY_BYTESWAP16(msg.stock_locate);\n" in struct_file
+    assert "  msg.timestamp.lo = ITCHPY_BYTESWAP32(msg.timestamp.lo);\n" in struct_file
+    assert "msg.message_type" not in struct_file
+    assert "msg.event_code" not in struct_file
+
+
+def test_compiler_endian_swap_runs(build_cpp):
+    main = r"""
+#include <cstdio>
+#include <cstring>
+#include "structs.h"
+
+int main()
+{
+    const unsigned char wire[] = {
+        'S', 0x00, 0x07, 0xff, 0xfe, 0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 'O',
+    };
+    itchpy::SystemEventMessage msg;
+    std::memcpy(&msg, wire, sizeof msg);
+    itchpy::EndianSwap(msg);
+    std::printf("%c %u %d %llu %c\n", msg.message_type, msg.stock_locate, msg.tracking_number,
+                (unsigned long long)msg.timestamp.value(), msg.event_code);
+
+    const unsigned char del[] = {
+        'D', 0x00, 0x05, 0x00, 0x01, 0xe2, 0x40, 0xff, 0xff, 0xff, 0xef,
+        0x3f, 0xe0, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    };
+    itchpy::OrderDeleteMessage order;
+    std::memcpy(&order, del, sizeof order);
+    itchpy::EndianSwap(order);
+    std::printf("%u %u %d %g\n", order.stock_locate, order.order_reference_number, order.price, order.score);
+}
+"""
+    exe = build_cpp(SCHEMA, main)
+
+    out = subprocess.run([str(exe)], check=True, capture_output=True, text=True).stdout
+
+    assert out.splitlines() == ["S 7 -2 4328719365 O", "5 123456 -17 0.5"]
+
+
+PARSE_MAIN = r"""
+#include <cstdio>
+#include "parser.h"
+
+using namespace itchpy;
+
+const unsigned char EVENT[] = {
+    'S', 0x00, 0x07, 0xff, 0xfe, 0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 'O',
+};
+const unsigned char DELETE[] = {
+    'D', 0x00, 0x05, 0x00, 0x01, 0xe2, 0x40, 0xff, 0xff, 0xff, 0xef,
+    0x3f, 0xe0, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+};
+
+struct Printer
+{
+    void operator()(const SystemEventMessage& m)
+    {
+        std::printf("S %u %llu\n", m.stock_locate, (unsigned long long)m.timestamp.value());
+    }
+    void operator()(const OrderDeleteMessage& m) { std::printf("D %d %g\n", m.price, m.score); }
+/* extra */
+};
+
+int main()
+{
+    Printer printer;
+/* body */
+}
+"""
+
+
+def parse_main(extra="", body=""):
+    return PARSE_MAIN.replace("/* extra */", extra).replace("/* body */", body)
+
+
+@pytest.mark.parametrize("dispatch", ["switch", "table"])
+def test_compiler_parse_runs(build_cpp, dispatch):
+    body = """
+    std::printf("%d\\n", (int)parse((const char*)EVENT, sizeof EVENT, printer));
+    std::printf("%d\\n", (int)parse((const char*)DELETE, sizeof DELETE, printer));
+    std::printf("%d\\n", (int)parse((const char*)DELETE, 5, printer));
+    std::printf("%d\\n", (int)parse("Z", 1, printer));
+    char longer[sizeof DELETE + 1] = {};
+    std::memcpy(longer, DELETE, sizeof DELETE);
+    std::printf("%d\\n", (int)parse(longer, sizeof longer, printer));
+"""
+    exe = build_cpp(SCHEMA, "#include <cstring>\n" + parse_main(body=body), dispatch=dispatch)
+
+    out = subprocess.run([str(exe)], check=True, capture_output=True, text=True).stdout
+
+    assert out.splitlines() == ["S 7 4328719365", "0", "D -17 0.5", "0", "2", "1", "4"]
+
+
+def test_compiler_views(tmp_path):
+    with open(tmp_path / "enums.h", "w") as enums, open(tmp_path / "structs.h", "w") as structs:
+        _, struct_file, parser_file = ItchCompiler(views=True).compile(SCHEMA, enums, structs)
+
+    assert "class OrderDeleteMessageView\n" in struct_file
+    assert "  static constexpr size_t size = 19;\n" in struct_file
+    assert "  int32_t price() const { return LoadBigEndian<int32_t>(buf_ + 7); }\n" in struct_file
+    assert "  uint64_t timestamp() const { return LoadTimestamp(buf_ + 5); }\n" in struct_file
+    assert "ParseStatus parseView(const char* msg, size_t len, Handler&& handler)" in parser_file
+
+    with open(tmp_path / "enums.h", "w") as enums, open(tmp_path / "structs.h", "w") as structs:
+        _, struct_file, parser_file = ItchCompiler().compile(SCHEMA, enums, structs)
+
+    assert "View" not in struct_file + parser_file
+
+
+def test_compiler_parse_view_runs(build_cpp):
+    extra = """
+    void operator()(const SystemEventMessageView& v)
+    {
+        std::printf("SV %u %llu\\n", v.stock_locate(), (unsigned long long)v.timestamp());
+    }
+    void operator()(const OrderDeleteMessageView& v) { std::printf("DV %d %g\\n", v.price(), v.score()); }
+"""
+    body = """
+    parseView((const char*)EVENT, sizeof EVENT, printer);
+    parseView((const char*)DELETE, sizeof DELETE, printer);
+    std::printf("%d\\n", (int)parseView((const char*)DELETE, 18, printer));
+    char padded[sizeof DELETE + 1] = {};
+    std::memcpy(padded, DELETE, sizeof DELETE);
+    std::printf("%d %d\\n", (int)parseView(padded, sizeof padded, printer), (int)parse(padded, sizeof padded, printer));
+"""
+    exe = build_cpp(SCHEMA, "#include <cstring>\n" + parse_main(extra, body), views=True)
+
+    out = subprocess.run([str(exe)], check=True, capture_output=True, text=True).stdout
+
+    # oversized frames are rejected by both paths
+    assert out.splitlines() == ["SV 7 4328719365", "DV -17 0.5", "2", "4 4"]
+
+
+@pytest.mark.parametrize("dispatch", ["switch", "table"])
+def test_compiler_parse_buffer_runs(build_cpp, dispatch):
+    body = r"""
+    char buf[64];
+    size_t len = 0;
+    for (int i = 0; i < 2; ++i) {
+        buf[len++] = 0;
+        buf[len++] = sizeof EVENT;
+        std::memcpy(buf + len, EVENT, sizeof EVENT);
+        len += sizeof EVENT;
+    }
+    buf[len++] = 0;
+    buf[len++] = sizeof DELETE;
+    std::memcpy(buf + len, DELETE, sizeof DELETE);
+    len += sizeof DELETE;
+    buf[len++] = 0;
+    buf[len++] = 19;
+    buf[len++] = 'D';
+
+    BufferResult result = parseBuffer(buf, len, printer);
+    std::printf("%zu %zu %zu\n", result.frames, result.consumed, len - result.consumed);
+"""
+    exe = build_cpp(SCHEMA, "#include <cstring>\n" + parse_main(body=body), dispatch=dispatch)
+
+    out = subprocess.run([str(exe)], check=True, capture_output=True, text=True).stdout
+
+    assert out.splitlines() == ["S 7 4328719365", "S 7 4328719365", "D -17 0.5", "3 49 3"]
+
+
+def test_compiler_layout_asserts(tmp_path):
+    with open(tmp_path / "enums.h", "w") as enums, open(tmp_path / "structs.h", "w") as structs:
+        _, struct_file, _ = ItchCompiler().compile(SCHEMA, enums, structs)
+
+    assert "#pragma pack(push, 1)\n" in struct_file
+    assert 'static_assert(sizeof(SystemEventMessage) == 12, "SystemEventMessage does not match its wire size");' in struct_file
+    assert 'static_assert(offsetof(OrderDeleteMessage, score) == 11, "OrderDeleteMessage::score does not match its wire offset");' in struct_file
+
+
+def test_compiler_layout_asserts_fail(tmp_path, build_cpp):
+    build_cpp(SCHEMA, '#include "structs.h"\nint main() {}\n', flags=["-Werror"])
+
+    # without packing the asserts must stop the build
+    structs = (tmp_path / "structs.h").read_text().replace("#pragma pack(push, 1)", "#pragma pack(push, 8)")
+    (tmp_path / "structs.h").write_text(structs)
+    result = subprocess.run(
+        [build_cpp.cxx, "-std=c++17", "-fsyntax-only", str(tmp_path / "structs.h")], capture_output=True, text=True
+    )
+
+    assert result.returncode != 0
+    assert "does not match its wire size" in result.stderr
+
+
+def test_compiler_table_dispatch(tmp_path):
+    with open(tmp_path / "enums.h", "w") as enums, open(tmp_path / "structs.h", "w") as structs:
+        _, _, parser_file = ItchCompiler(dispatch="table").compile(SCHEMA, enums, structs)
+
+    assert "switch (MessageType(msg[0]))" not in parser_file
+    assert (
+        "entries[static_cast<unsigned char>(MessageType::OrderDeleteMessage)] = entry<MessageType::OrderDeleteMessage, OrderDeleteMessage>();"
+        in parser_file
+    )
+
+    with pytest.raises(ValueError):
+        ItchCompiler(dispatch="jump")
+
+
+def test_compiler_dispatches_every_struct(tmp_path):
+    schema = SCHEMA.replace("SystemEventMessage", "SecondsMessage")
+    with open(tmp_path / "enums.h", "w") as enums, open(tmp_path / "structs.h", "w") as structs:
+        with pytest.raises(ValueError, match="SecondsMessage"):
+            ItchCompiler().compile(schema, enums, structs)
+
+        compiler = ItchCompiler(message_types={"SecondsMessage": "T", "OrderDeleteMessage": "D"})
+        _, _, parser_file = compiler.compile(schema, enums, structs)
+
+    assert "case MessageType::SecondsMessage:" in parser_file
+    assert "case MessageType::OrderDeleteMessage:" in parser_file
+
+
+@pytest.mark.parametrize("dispatch", ["switch", "table"])
+def test_compiler_subscription_runs(build_cpp, dispatch):
+    # the handler cannot take an OrderDeleteMessage, so this only compiles if
+    # unsubscribed types are never parsed
+    main = r"""
+#include <cstdio>
+#include "parser.h"
+
+using namespace itchpy;
+
+const unsigned char EVENT[] = {
+    'S', 0x00, 0x07, 0xff, 0xfe, 0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 'O',
+};
+const char DELETE[] = {'D'};
+
+int main()
+{
+    auto handler = [](const SystemEventMessage& m) { std::printf("S %u\n", m.stock_locate); };
+    using Events = Subscribe<MessageType::SystemEventMessage>;
+    std::printf("%d\n", (int)parse<Events>((const char*)EVENT, sizeof EVENT, handler));
+    std::printf("%d\n", (int)parse<Events>(DELETE, sizeof DELETE, handler));
+    std::printf("%d\n", (int)parse<Events>("Z", 1, handler));
+    static_assert(SubscribeAll::contains(MessageType::OrderDeleteMessage), "");
+    static_assert(!Events::contains(MessageType::OrderDeleteMessage), "");
+}
+"""
+    exe = build_cpp(SCHEMA, main, dispatch=dispatch)
+
+    out = subprocess.run([str(exe)], check=True, capture_output=True, text=True).stdout
+
+    assert out.splitlines() == ["S 7", "0", "3", "1"]
+
+
+def test_compiler_parse_block_runs(build_cpp):
+    body = r"""
+    char buf[64];
+    size_t len = 0;
+    std::memcpy(buf + len, DELETE, sizeof DELETE);
+    len += sizeof DELETE;
+    std::memcpy(buf + len, EVENT, sizeof EVENT);
+    len += sizeof EVENT;
+    std::memcpy(buf + len, EVENT, 4);
+    len += 4;
+
+    static_assert(wireLengths['S'] == 12 && wireLengths['D'] == 19 && wireLengths['Z'] == 0, "");
+    BufferResult result = parseBlock(buf, len, printer);
+    std::printf("%zu %zu\n", result.frames, result.consumed);
+    result = parseBlock("Z", 1, printer);
+    std::printf("%zu %zu\n", result.frames, result.consumed);
+"""
+    exe = build_cpp(SCHEMA, "#include <cstring>\n" + parse_main(body=body))
+
+    out = subprocess.run([str(exe)], check=True, capture_output=True, text=True).stdout
+
+    assert out.splitlines() == ["D -17 0.5", "S 7 4328719365", "2 31", "0 0"]
+
+
+@pytest.mark.parametrize("dispatch", ["switch", "table"])
+def test_compiler_message_handler_runs(build_cpp, dispatch):
+    main = r"""
+#include <cstdio>
+#include "parser.h"
+
+using namespace itchpy;
+
+const unsigned char EVENT[] = {
+    'S', 0x00, 0x07, 0xff, 0xfe, 0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 'O',
+};
+const unsigned char DELETE[] = {
+    'D', 0x00, 0x05, 0x00, 0x01, 0xe2, 0x40, 0xff, 0xff, 0xff, 0xef,
+    0x3f, 0xe0, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+};
+
+struct Events : MessageHandler<Events>
+{
+    int count = 0;
+    void onSystemEventMessage(const SystemEventMessage& m) { std::printf("S %u\n", m.stock_locate); ++count; }
+};
+
+int main()
+{
+    Events events;
+    std::printf("%d\n", (int)parse((const char*)DELETE, sizeof DELETE, events));
+    std::printf("%d\n", (int)parse<Handled<Events>>((const char*)EVENT, sizeof EVENT, events));
+    std::printf("%d\n", (int)parse<Handled<Events>>((const char*)DELETE, sizeof DELETE, events));
+    std::printf("%d\n", events.count);
+    static_assert(Handled<Events>::contains(MessageType::SystemEventMessage), "");
+    static_assert(!Handled<Events>::contains(MessageType::OrderDeleteMessage), "");
+}
+"""
+    exe = build_cpp(SCHEMA, main, dispatch=dispatch)
+
+    out = subprocess.run([str(exe)], check=True, capture_output=True, text=True).stdout
+
+    assert out.splitlines() == ["0", "S 7", "0", "3", "1"]
+
+
+@pytest.mark.parametrize("dispatch", ["switch", "table"])
+def test_compiler_bench_runs(build_cpp, tmp_path, make_frames, dispatch):
+    event = bytes([0x53, 0, 7, 0xFF, 0xFE, 0, 1, 2, 3, 4, 5, 0x4F])
+    delete = b"D" + bytes(18)
+    day = tmp_path / "day.itch"
+    day.write_bytes(make_frames([event] * 3 + [delete] * 5 + [b"Z"]))
+    bench = ItchCompiler().compile_bench(SCHEMA, SimpleNamespace(name="parser.h"))
+    exe = build_cpp(SCHEMA, bench, dispatch=dispatch)
+
+    out = subprocess.run([str(exe), str(day), "2"], check=True, capture_output=True, text=True).stdout
+
+    rows = [line.split() for line in out.splitlines()]
+    assert rows[0] == ["message", "count", "msgs/sec", "ns/msg"]
+    assert [row[:2] for row in rows[1:]] == [["total", "9"], ["SystemEventMessage", "3"], ["OrderDeleteMessage", "5"]]
+    assert all(float(row[3]) > 0 for row in rows[1:])
+
+
+def test_compile_cli_incremental(tmp_path, monkeypatch):
+    monkeypatch.setenv("ITCHPY_CACHE_DIR", str(tmp_path / "cache"))
+    (tmp_path / "spec.itch").write_text(SCHEMA)
+    outputs = [tmp_path / name for name in ("enums.h", "structs.h", "parser.h", "gen.py")]
+    args = [str(tmp_path / "spec.itch"), *map(str, outputs[:3]), "--python", str(outputs[3])]
+    runner = CliRunner()
+
+    assert runner.invoke(itchc.compile, args).exit_code == 0
+    stamps = [os.stat(p).st_mtime_ns for p in outputs]
+    contents = [p.read_text() for p in outputs]
+
+    # a cache hit neither regenerates nor rewrites anything
+    monkeypatch.setattr(ItchCompiler, "compile_outputs", None)
+    assert runner.invoke(itchc.compile, args).exit_code == 0
+    assert [os.stat(p).st_mtime_ns for p in outputs] == stamps
+
+    # a miss rewrites only the outputs whose contents change
+    monkeypatch.undo()
+    monkeypatch.setenv("ITCHPY_CACHE_DIR", str(tmp_path / "cache"))
+    outputs[2].write_text("stale")
+    assert runner.invoke(itchc.compile, args + ["--dispatch", "table"]).exit_code == 0
+    assert [os.stat(p).st_mtime_ns for p in outputs[:2]] == stamps[:2]
+    assert [p.read_text() for p in outputs[:2]] == contents[:2]
+    assert "DispatchTable" in outputs[2].read_text()
+
+
+def test_compile_cli_message_types(tmp_path):
+    schema = SCHEMA.replace("SystemEventMessage", "SecondsMessage").replace("OrderDeleteMessage", "AddOrder")
+    (tmp_path / "spec.itch").write_text(schema)
+    args = [str(tmp_path / "spec.itch"), *(str(tmp_path / name) for name in ("enums.h", "structs.h", "parser.h"))]
+    args += ["--python", str(tmp_path / "gen.py"), "--no-cache"]
+    runner = CliRunner()
+
+    result = runner.invoke(itchc.compile, args)
+
+    assert result.exit_code != 0
+    assert "no message_type for struct(s) SecondsMessage, AddOrder" in result.output
+
+    (tmp_path / "types.json").write_text('{"SecondsMessage": "T", "AddOrder": "A"}')
+    result = runner.invoke(itchc.compile, args + ["--message-types", str(tmp_path / "types.json")])
+
+    assert result.exit_code == 0, result.output
+    assert "SecondsMessage = 'T'" in (tmp_path / "enums.h").read_text()
+    assert "ord('A'): decode_AddOrder" in (tmp_path / "gen.py").read_text()
+
+    (tmp_path / "types.json").write_text('{"SecondsMessage": "TT"}')
+    result = runner.invoke(itchc.compile, args + ["--message-types", str(tmp_path / "types.json")])
+
+    assert result.exit_code != 0
+    assert "single characters" in result.output
+
+
+def test_batch_cli(tmp_path, monkeypatch, build_cpp):
+    monkeypatch.setenv("ITCHPY_CACHE_DIR", str(tmp_path / "cache"))
+    schemas = tmp_path / "schemas"
+    schemas.mkdir()
+    (schemas / "itch50.itch").write_text(SCHEMA)
+    (schemas / "psx-2.itch").write_text(SCHEMA.replace("score:double;", ""))
+    out = tmp_path / "out"
+
+    result = CliRunner().invoke(itchc.cli, ["batch", str(schemas), "-o", str(out), "-j", "2", "--python"])
+
+    assert result.exit_code == 0, result.output
+    assert sorted(p.name for p in (out / "psx_2").iterdir()) == ["enums.h", "parser.h", "psx_2.py", "structs.h"]
+    main = r"""
+#include <cstdio>
+#include "itch50/parser.h"
+#include "psx_2/parser.h"
+
+static_assert(sizeof(itch50::OrderDeleteMessage) == 19, "");
+static_assert(sizeof(psx_2::OrderDeleteMessage) == 11, "");
+
+int main()
+{
+    const char msg[] = {'D', 0, 5, 0, 1, (char)0xe2, 0x40, 0, 0, 0, 9};
+    auto handler = [](const auto& m) { std::printf("%u\n", m.stock_locate); };
+    std::printf("%d\n", (int)itch50::parse(msg, sizeof msg, handler));
+    std::printf("%d\n", (int)psx_2::parse(msg, sizeof msg, handler));
+}
+"""
+    (out / "main.cpp").write_text(main)
+    include = os.path.dirname(itchpy.__file__)
+    exe = out / "main"
+    subprocess.run(
+        [build_cpp.cxx, "-std=c++17", "-Wall", "-I", include, "-o", str(exe), str(out / "main.cpp")], check=True
+    )
+
+    run = subprocess.run([str(exe)], check=True, capture_output=True, text=True).stdout
+
+    # the 11 byte message is truncated in itch50, whole in psx_2
+    assert run.splitlines() == ["2", "5", "0"]
+
+
+def test_batch_cli_message_types(tmp_path):
+    historical = SCHEMA.replace("SystemEventMessage", "SecondsMessage")
+    (tmp_path / "itch41.itch").write_text(historical)
+    (tmp_path / "bx.itch").write_text(historical)
+    (tmp_path / "itch41.types.json").write_text('{"SecondsMessage": "T", "OrderDeleteMessage": "D"}')
+    out = tmp_path / "out"
+    args = ["batch", str(tmp_path / "*.itch"), "-o", str(out), "-j", "1", "--python", "--no-cache"]
+    runner = CliRunner()
+
+    result = runner.invoke(itchc.cli, args)
+
+    assert result.exit_code != 0
+    assert "bx.itch: no message_type for struct(s) SecondsMessage" in result.output
+
+    (tmp_path / "all.json").write_text('{"SecondsMessage": "t", "OrderDeleteMessage": "d"}')
+    result = runner.invoke(itchc.cli, args + ["--message-types", str(tmp_path / "all.json")])
+
+    assert result.exit_code == 0, result.output
+    # the sidecar takes precedence over --message-types
+    assert "ord('T'): decode_SecondsMessage" in (out / "itch41" / "itch41.py").read_text()
+    assert "ord('t'): decode_SecondsMessage" in (out / "bx" / "bx.py").read_text()
+
+
+def test_batch_cli_namespace_clash(tmp_path):
+    for name in ("a-b.itch", "a_b.itch"):
+        (tmp_path / name).write_text(SCHEMA)
+
+    result = CliRunner().invoke(itchc.cli, ["batch", str(tmp_path), "-o", str(tmp_path / "out")])
+
+    assert result.exit_code != 0
+    assert "a_b" in result.output
+
+
+def test_output_cache_tracks_cxx(tmp_path, monkeypatch):
+    monkeypatch.setenv("ITCHPY_CACHE_DIR", str(tmp_path / "cache"))
+    built = []
+
+    def compile_outputs(self, data, targets):
+        built.append(os.environ["CXX"])
+        return {role: b"" for role in targets}
+
+    monkeypatch.setattr(ItchCompiler, "compile_outputs", compile_outputs)
+    targets = {"enums": "enums.h", "structs": "structs.h", "parser": "parser.h", "shared_lib": "lib.so"}
+    for version in ("1", "1", "2"):
+        cxx = tmp_path / f"cxx{version}"
+        cxx.write_text(f"#!/bin/sh\necho fake c++ {version}\n")
+        cxx.chmod(0o755)
+        monkeypatch.setenv("CXX", str(cxx))
+        itchc.build_outputs(SCHEMA, targets)
+
+    assert built == [str(tmp_path / "cxx1"), str(tmp_path / "cxx2")]
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from itchpy import descriptor
+from itchpy.cpp_gen import CPPGenerator
+from itchpy.itch_ast import Enum, Struct
+from itchpy.itchc import ItchCompiler
+from itchpy.layout import compute_layout
+from itchpy.py_gen import PyGenerator
+
+SCHEMA = """
+enum EventCode: char {
+    O,
+    S
+}
+struct SystemEventMessage {
+    message_type:char;
+    stock_locate:ushort;
+    tracking_number:short;
+    timestamp:time;
+    event_code:char;
+}
+struct OrderDeleteMessage {
+    message_type:char;
+    stock_locate:ushort;
+    order_reference_number:ulong;
+    price:long;
+    score:double;
+}
+"""
+
+
+@pytest.fixture
+def ast(lexer, parser):
+    return parser.parse(lexer.tokenize(SCHEMA))
+
+
+def test_descriptor_round_trip(ast):
+    text = descriptor.dumps(ast)
+    loaded, layout = descriptor.loads(text)
+
+    assert layout == compute_layout(ast)
+    assert [f.name for f in layout.header] == ["message_type", "stock_locate"]
+    assert isinstance(loaded.decls[0], Enum)
+    assert [e.name for e in loaded.decls[0].values.enumerators] == ["O", "S"]
+    assert all(isinstance(d, Struct) for d in loaded.decls[1:])
+    assert descriptor.dumps(loaded, layout) == text
+
+
+def test_descriptor_generates_same_code(ast):
+    loaded, layout = descriptor.loads(descriptor.dumps(ast))
+
+    assert PyGenerator().visit(loaded) == PyGenerator().visit(ast)
+    gen = CPPGenerator()
+    assert [gen.visit(d) for d in loaded.decls] == [gen.visit(d) for d in ast.decls]
+
+
+def test_descriptor_message_types(ast):
+    d = json.loads(descriptor.dumps(ast, message_types={"SystemEventMessage": "s", "OrderDeleteMessage": "d"}))
+
+    assert d["format"] == "itchpy-schema"
+    assert d["version"] == descriptor.DESCRIPTOR_VERSION
+    assert [s["message_type"] for s in d["layout"]["structs"]] == ["s", "d"]
+    assert d["layout"]["structs"][1]["fields"][3] == {
+        "name": "price",
+        "type": "long",
+        "offset": 7,
+        "wire_size": 4,
+        "native_size": 4,
+    }
+
+
+def test_descriptor_custom_message_types(ast, load_module):
+    custom = {"SystemEventMessage": "s", "OrderDeleteMessage": "d"}
+    loaded, layout = descriptor.loads(descriptor.dumps(ast, message_types=custom))
+
+    assert descriptor.message_types(layout) == custom
+    source = PyGenerator(descriptor.message_types(layout)).visit(loaded)
+    assert source == PyGenerator(custom).visit(ast) != PyGenerator().visit(ast)
+    assert load_module(source).WIRE_LENGTHS == {ord("s"): 12, ord("d"): 19}
+    assert ItchCompiler(message_types=custom).compile_python(SCHEMA) == source
+
+
+def test_descriptor_version(ast):
+    d = descriptor.to_dict(ast)
+    d["version"] += 1
+
+    with pytest.raises(ValueError, match="unsupported descriptor version"):
+        descriptor.from_dict(d)
+    with pytest.raises(ValueError, match="not an itchpy schema descriptor"):
+        descriptor.from_dict({"decls": []})
+
+
+def test_compile_descriptor(ast):
+    assert descriptor.loads(ItchCompiler().compile_descriptor(SCHEMA))[1] == compute_layout(ast)
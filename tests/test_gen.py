@@ -34,7 +34,7 @@ def test_cpp_gen_struct(lexer, parser, generator):
     output = """struct a
 {
   char b;
-  short c;
+  int16_t c;
 }
 """
 
@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+
+from itchpy import columnar
+from itchpy.index import FrameIndex, load_index, sidecar_path
+
+
+def write_day(path, make_frames, payloads):
+    path.write_bytes(make_frames(payloads))
+    return path
+
+
+def test_build(make_frames):
+    buf = make_frames([b"A\x01", b"B", b"A\x02", b""])
+
+    index = FrameIndex.build(buf)
+
+    assert len(index) == 4
+    assert index.offsets.tolist() == [2, 6, 9, 13]
+    assert index.lengths.tolist() == [2, 1, 2, 0]
+    assert index.types.tolist() == [ord("A"), ord("B"), ord("A"), 0]
+    assert index.count(ord("A")) == 2
+    assert index.select(ord("A")).tolist() == [2, 9]
+
+
+def test_extract(make_frames):
+    buf = make_frames([b"A\x01", b"B", b"A\x02"])
+    dtype = np.dtype([("message_type", "S1"), ("value", "u1")])
+
+    result = FrameIndex.build(buf).extract(buf, ord("A"), dtype)
+
+    assert result["value"].tolist() == [1, 2]
+
+
+def test_load_index_caches(tmp_path, make_frames):
+    path = write_day(tmp_path / "day.itch", make_frames, [b"A\x01", b"B"])
+
+    index = load_index(path)
+    assert os.path.exists(sidecar_path(path))
+
+    cached = load_index(path)
+    assert cached.offsets.tolist() == index.offsets.tolist()
+    assert cached.types.tolist() == index.types.tolist()
+
+
+def test_load_index_unwritable(tmp_path, make_frames, monkeypatch):
+    path = write_day(tmp_path / "day.itch", make_frames, [b"A\x01", b"B"])
+
+    def read_only(src, dst):
+        raise PermissionError(30, "Read-only file system")
+
+    monkeypatch.setattr(os, "replace", read_only)
+    index = load_index(path)
+
+    assert index.types.tolist() == [ord("A"), ord("B")]
+    assert sorted(os.listdir(tmp_path)) == ["day.itch"]
+
+
+def test_load_index_invalidated(tmp_path, make_frames):
+    path = write_day(tmp_path / "day.itch", make_frames, [b"A\x01", b"B"])
+    load_index(path)
+    st = os.stat(path)
+
+    # same size and mtime, different leading bytes
+    write_day(path, make_frames, [b"C\x01", b"B"])
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert load_index(path).types.tolist() == [ord("C"), ord("B")]
+
+    write_day(path, make_frames, [b"C\x01", b"B", b"D"])
+
+    assert load_index(path).count(ord("D")) == 1
+
+
+def test_load_index_corrupt_sidecar(tmp_path, make_frames):
+    path = write_day(tmp_path / "day.itch", make_frames, [b"A\x01"])
+    with open(sidecar_path(path), "wb") as f:
+        f.write(b"garbage")
+
+    assert load_index(path).count(ord("A")) == 1
+
+
+def test_index_skips_framing(make_frames, monkeypatch):
+    dtype = np.dtype([("message_type", "S1"), ("value", ">u4")])
+    header = np.dtype([("message_type", "S1")])
+    buf = make_frames([b"A\x00\x00\x00\x01", b"Bzz", b"A\x00\x00\x01\x00"])
+    index = FrameIndex.build(buf)
+
+    def no_scan(buf):
+        raise AssertionError("framing pass not skipped")
+
+    monkeypatch.setattr(columnar, "frame_offsets", no_scan)
+    columns = columnar.decode_columns(buf, {ord("A"): dtype}, index)
+    headers = columnar.scan_headers(buf, header, index)
+
+    assert columns[ord("A")]["value"].tolist() == [1, 256]
+    assert headers["message_type"].tolist() == [b"A", b"B", b"A"]
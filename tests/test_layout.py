@@ -0,0 +1,82 @@
+import pytest
+
+from itchpy.itch_types import TYPES
+from itchpy.layout import LayoutPass, compute_layout
+
+
+SCHEMA = """
+enum EventCode: char {
+    O,
+    S
+}
+struct SystemEventMessage {
+    message_type:char;
+    stock_locate:ushort;
+    tracking_number:ushort;
+    timestamp:time;
+    event_code:char;
+}
+struct OrderDeleteMessage {
+    message_type:char;
+    stock_locate:ushort;
+    tracking_number:short;
+    price:long;
+    score:double;
+}
+"""
+
+
+@pytest.fixture
+def layout(lexer, parser):
+    return compute_layout(parser.parse(lexer.tokenize(SCHEMA)))
+
+
+def test_layout_fields(layout):
+    event, delete = layout.structs
+
+    assert [(f.name, f.offset, f.wire_size, f.native_size) for f in event.fields] == [
+        ("message_type", 0, 1, 1),
+        ("stock_locate", 1, 2, 2),
+        ("tracking_number", 3, 2, 2),
+        ("timestamp", 5, 6, 8),
+        ("event_code", 11, 1, 1),
+    ]
+    assert event.fields[3].type is TYPES["time"]
+    assert [f.offset for f in delete.fields] == [0, 1, 3, 5, 9]
+
+
+def test_layout_sizes(layout):
+    event, delete = layout.structs
+
+    assert (event.wire_size, event.native_size) == (12, 14)
+    assert (delete.wire_size, delete.native_size) == (17, 17)
+
+
+def test_layout_message_types(lexer, parser, layout):
+    assert [s.message_type for s in layout.structs] == ["S", "D"]
+
+    ast = parser.parse(lexer.tokenize(SCHEMA))
+    custom = LayoutPass({"SystemEventMessage": "s", "OrderDeleteMessage": "d"}).visit(ast)
+
+    assert [s.message_type for s in custom.structs] == ["s", "d"]
+
+
+def test_layout_message_types_missing(lexer, parser):
+    ast = parser.parse(lexer.tokenize(SCHEMA))
+
+    with pytest.raises(ValueError, match="no message_type for struct.* SystemEventMessage$"):
+        LayoutPass({"OrderDeleteMessage": "d"}).visit(ast)
+    with pytest.raises(ValueError, match="sharing a message_type: SystemEventMessage, OrderDeleteMessage"):
+        LayoutPass({"SystemEventMessage": "d", "OrderDeleteMessage": "d"}).visit(ast)
+
+
+def test_layout_header(layout):
+    # tracking_number differs in type between the two structs
+    assert [f.name for f in layout.header] == ["message_type", "stock_locate"]
+
+
+def test_layout_empty(lexer, parser):
+    layout = compute_layout(parser.parse(lexer.tokenize("")))
+
+    assert layout.structs == []
+    assert layout.header == []
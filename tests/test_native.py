@@ -0,0 +1,94 @@
+import shutil
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from itchpy.columnar import decode_columns
+from itchpy.itchc import ItchCompiler
+from itchpy.native import NativeDecoder
+
+SCHEMA = """
+struct SystemEventMessage {
+    message_type:char;
+    stock_locate:ushort;
+    tracking_number:short;
+    timestamp:time;
+    event_code:char;
+}
+struct OrderDeleteMessage {
+    message_type:char;
+    stock_locate:ushort;
+    order_reference_number:ulong;
+    price:long;
+    score:double;
+}
+"""
+
+
+@pytest.fixture
+def library(tmp_path, load_module):
+    if shutil.which("g++") is None and shutil.which("clang++") is None:
+        pytest.skip("no C++ compiler available")
+    comp = ItchCompiler()
+    lib = tmp_path / "libitch.so"
+    comp.build_shared_lib(SCHEMA, lib)
+    return lib, load_module(comp.compile_python(SCHEMA))
+
+
+@pytest.fixture
+def decoder(library):
+    lib, module = library
+    return NativeDecoder(lib, module.DTYPES), module
+
+
+@pytest.fixture
+def day(make_frames):
+    payloads = []
+    for i in range(100):
+        if i % 4:
+            payloads.append(b"D" + struct.pack(">HIid", i, 1000 + i, -i, i / 4))
+        else:
+            payloads.append(b"S" + struct.pack(">HhHIc", i, -i, 1, i << 8, b"O"))
+    # unknown types and a trailing partial frame are skipped
+    return make_frames(payloads + [b"Z\x00"]) + b"\x00\x10D"
+
+
+def test_native_decode_columns(decoder, day):
+    native, module = decoder
+
+    result = native.decode_columns(day)
+
+    expected = decode_columns(day[:-3], module.DTYPES)
+    for type_byte, array in expected.items():
+        assert result[type_byte].dtype == array.dtype
+        assert result[type_byte].tolist() == array.tolist()
+
+
+def test_native_decode_threads(decoder, day):
+    native, module = decoder
+    expected = native.decode_columns(day)
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(native.decode_columns, [day] * 8))
+
+    for result in results:
+        for type_byte, array in expected.items():
+            assert result[type_byte].tolist() == array.tolist()
+
+
+def test_native_malformed(decoder, make_frames):
+    native, module = decoder
+    with pytest.raises(ValueError, match="1 messages"):
+        native.decode_columns(make_frames([b"D" + bytes(10)]))
+
+
+def test_native_skips_unrequested_types(library, make_frames):
+    lib, module = library
+    dtypes = {ord("S"): module.DTYPES[ord("S")]}
+    buf = make_frames([b"S" + struct.pack(">HhHIc", 1, -1, 1, 256, b"O"), b"D\x00"])
+
+    result = NativeDecoder(lib, dtypes).decode_columns(buf)
+
+    assert list(result) == [ord("S")]
+    assert result[ord("S")].tolist() == decode_columns(buf, dtypes)[ord("S")].tolist()
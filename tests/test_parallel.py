@@ -0,0 +1,86 @@
+import struct
+
+import numpy as np
+import pytest
+
+from itchpy.columnar import decode_columns
+from itchpy.index import FrameIndex
+from itchpy.parallel import decode_parallel, resync, split_chunks
+
+A = np.dtype([("message_type", "S1"), ("value", ">u4")])
+B = np.dtype([("message_type", "S1"), ("value", ">u2"), ("flag", "S1")])
+DTYPES = {ord("A"): A, ord("B"): B}
+WIRE_LENGTHS = {ord("A"): 5, ord("B"): 4}
+
+
+@pytest.fixture
+def day(make_frames):
+    payloads = []
+    for i in range(200):
+        if i % 3:
+            payloads.append(b"A" + struct.pack(">I", i))
+        else:
+            payloads.append(b"B" + struct.pack(">H", i) + b"x")
+    return make_frames(payloads)
+
+
+def test_resync(make_frames):
+    buf = make_frames([b"A\x00\x00\x00\x05", b"B\x00\x05x", b"A\x00\x00\x00\x07"])
+
+    assert resync(buf, 0, WIRE_LENGTHS) == 0
+    assert resync(buf, 1, WIRE_LENGTHS) == 7
+    assert resync(buf, 8, WIRE_LENGTHS) == 13
+    assert resync(buf, 14, WIRE_LENGTHS) == len(buf)
+
+
+def test_split_chunks(day):
+    by_resync = split_chunks(day, 4, WIRE_LENGTHS)
+    by_index = split_chunks(day, 4, index=FrameIndex.build(day))
+
+    for chunks in by_resync, by_index:
+        assert len(chunks) == 4
+        assert chunks[0][0] == 0
+        assert chunks[-1][1] == len(day)
+        starts = set(FrameIndex.build(day).offsets.tolist())
+        assert all(start + 2 in starts for start, end in chunks[1:])
+
+
+@pytest.mark.parametrize("use_index", [False, True])
+def test_decode_parallel(tmp_path, day, use_index):
+    path = tmp_path / "day.itch"
+    path.write_bytes(day)
+    index = FrameIndex.build(day) if use_index else None
+
+    result = decode_parallel(path, DTYPES, workers=3, index=index)
+
+    expected = decode_columns(day, DTYPES)
+    for type_byte in DTYPES:
+        assert result[type_byte].tolist() == expected[type_byte].tolist()
+
+
+def test_decode_parallel_empty(tmp_path):
+    path = tmp_path / "empty.itch"
+    path.write_bytes(b"")
+
+    result = decode_parallel(path, DTYPES, workers=2)
+
+    assert len(result[ord("A")]) == 0
+
+
+def test_resync_limit(make_frames):
+    buf = make_frames([b"B\x00\x05x"] * 100)
+
+    with pytest.raises(ValueError, match="WIRE_LENGTHS"):
+        resync(buf, 1, {ord("A"): 5}, limit=64)
+    assert resync(buf, len(buf) - 3, {ord("A"): 5}, limit=64) == len(buf)
+
+
+def test_decode_parallel_subset(tmp_path, day):
+    path = tmp_path / "day.itch"
+    path.write_bytes(day)
+    only_a = {ord("A"): A}
+
+    result = decode_parallel(path, only_a, workers=3, wire_lengths=WIRE_LENGTHS)
+
+    assert result[ord("A")].tolist() == decode_columns(day, only_a)[ord("A")].tolist()
+    assert len(split_chunks(day, 3, WIRE_LENGTHS)) == 3
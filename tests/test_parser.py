@@ -1,5 +1,12 @@
+import os
+import subprocess
+import sys
+
 import pytest
 
+from itchpy import parsetab
+from itchpy.parser import ITCHParser
+
 from itchpy.itch_ast import (
     FileAST,
     Struct,
@@ -32,3 +39,37 @@ def test_parse_error(lexer, parser):
     result = parser.parse(lexer.tokenize("enum Ticket: thing"))
     assert parser.errors[0].type == "ID"
     assert parser.errors[0].value == "thing"
+
+
+def test_parsetab_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setenv("ITCHPY_CACHE_DIR", str(tmp_path))
+    key = parsetab.grammar_hash(ITCHParser._grammar, ITCHParser.tokens)
+    assert parsetab.load_tables(key) is None
+
+    parsetab.save_tables(key, ITCHParser._lrtable)
+    tables = parsetab.load_tables(key)
+
+    assert tables.lr_action == ITCHParser._lrtable.lr_action
+    assert tables.lr_goto == ITCHParser._lrtable.lr_goto
+    assert tables.defaulted_states == ITCHParser._lrtable.defaulted_states
+    assert parsetab.load_tables("0" * 64) is None
+
+
+def test_parsetab_reused_on_import(tmp_path):
+    env = dict(os.environ, ITCHPY_CACHE_DIR=str(tmp_path))
+    script = (
+        "from itchpy.lexer import ITCHLexer\n"
+        "from itchpy.parser import ITCHParser\n"
+        "print(type(ITCHParser._lrtable).__name__)\n"
+        "print(ITCHParser().parse(ITCHLexer().tokenize('struct add { m_type:char; stamp:time; }')))\n"
+    )
+
+    def run():
+        return subprocess.run([sys.executable, "-c", script], env=env, check=True, capture_output=True, text=True)
+
+    first, second = run().stdout.splitlines(), run().stdout.splitlines()
+
+    assert first[0] == "LRTable"
+    assert second[0] == "CachedTables"
+    assert first[1:] == second[1:]
+    assert len(list(tmp_path.glob("lalr-v*/*.json"))) == 1
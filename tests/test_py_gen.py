@@ -0,0 +1,234 @@
+import struct
+import subprocess
+import sys
+
+import pytest
+
+from itchpy.index import FrameIndex
+from itchpy.itchc import ItchCompiler
+from itchpy.py_gen import PyGenerator
+
+
+SCHEMA = """
+enum EventCode: char {
+    O,
+    S
+}
+struct SystemEventMessage {
+    message_type:char;
+    stock_locate:short;
+    tracking_number:short;
+    timestamp:time;
+    event_code:char;
+}
+struct OrderDeleteMessage {
+    message_type:char;
+    stock_locate:ushort;
+    order_reference_number:ulong;
+    price:long;
+    score:double;
+}
+"""
+
+
+@pytest.fixture
+def module(load_module):
+    return load_module(ItchCompiler().compile_python(SCHEMA))
+
+
+def test_py_gen_formats(lexer, parser):
+    ast = parser.parse(lexer.tokenize(SCHEMA))
+    result = PyGenerator().visit(ast)
+
+    assert "_SystemEventMessage = struct.Struct('>chhHIc')" in result
+    assert "_OrderDeleteMessage = struct.Struct('>cHIid')" in result
+
+
+def test_py_gen_decode_time(module):
+    buf = b"S" + struct.pack(">hh", 7, 3) + (0x0102030405).to_bytes(6, "big") + b"O"
+
+    msg = module.decode(buf)
+
+    assert isinstance(msg, module.SystemEventMessage)
+    assert msg == (b"S", 7, 3, 0x0102030405, b"O")
+    assert msg.timestamp == 0x0102030405
+
+
+def test_py_gen_decode_offset(module):
+    buf = b"xx" + b"D" + struct.pack(">HIid", 5, 123456, -17, 0.5)
+
+    msg = module.decode(memoryview(buf), 2)
+
+    assert msg == module.OrderDeleteMessage(b"D", 5, 123456, -17, 0.5)
+
+
+def test_py_gen_dispatch(module):
+    assert module.DECODERS == {
+        ord("S"): module.decode_SystemEventMessage,
+        ord("D"): module.decode_OrderDeleteMessage,
+    }
+    assert module.decode(b"Z" + bytes(20)) is None
+
+
+def test_py_gen_custom_message_types(lexer, parser, load_module):
+    ast = parser.parse(lexer.tokenize(SCHEMA))
+    module = load_module(PyGenerator({"SystemEventMessage": "s", "OrderDeleteMessage": "d"}).visit(ast))
+
+    assert list(module.DECODERS) == [ord("s"), ord("d")]
+
+
+def test_py_gen_dtype(module):
+    dtype = module.SystemEventMessage_dtype
+
+    assert dtype.itemsize == 12
+    assert dtype.names == (
+        "message_type",
+        "stock_locate",
+        "tracking_number",
+        "timestamp",
+        "event_code",
+    )
+    assert dtype["stock_locate"].str == ">i2"
+    assert dtype["timestamp"].shape == (6,)
+    assert module.OrderDeleteMessage_dtype.itemsize == 19
+    assert module.DTYPES[ord("D")] is module.OrderDeleteMessage_dtype
+
+
+def test_py_gen_decode_columns(module, make_frames):
+    buf = make_frames(
+        [
+            b"S" + struct.pack(">hh", 1, 0) + (9).to_bytes(6, "big") + b"O",
+            b"D" + struct.pack(">HIid", 5, 10, -1, 1.5),
+            b"D" + struct.pack(">HIid", 6, 11, -2, 2.5),
+        ]
+    )
+
+    columns = module.decode_columns(buf)
+
+    assert columns[ord("S")]["stock_locate"].tolist() == [1]
+    assert columns[ord("S")]["timestamp"].tolist() == [9]
+    assert columns[ord("D")]["order_reference_number"].tolist() == [10, 11]
+    assert columns[ord("D")]["score"].tolist() == [1.5, 2.5]
+
+
+def test_py_gen_view(module):
+    first = b"S" + struct.pack(">hh", 7, 3) + (0x0102030405).to_bytes(6, "big") + b"O"
+    second = b"S" + struct.pack(">hh", 8, 4) + (6).to_bytes(6, "big") + b"C"
+    view = module.SystemEventMessageView()
+
+    assert view.point(first) is view
+    assert (view.stock_locate, view.timestamp, view.event_code) == (7, 0x0102030405, b"O")
+    assert view.point(b"..." + second, 3).stock_locate == 8
+    assert view.timestamp == 6
+    assert view.decode() == module.SystemEventMessage(b"S", 8, 4, 6, b"C")
+    assert not hasattr(view, "__dict__")
+
+
+def test_py_gen_view_dispatch(module):
+    buf = b"D" + struct.pack(">HIid", 5, 123456, -17, 0.5)
+    views = {t: cls() for t, cls in module.VIEWS.items()}
+
+    view = views[buf[0]].point(buf)
+
+    assert isinstance(view, module.OrderDeleteMessageView)
+    assert (view.price, view.score) == (-17, 0.5)
+
+
+def test_py_gen_scan_headers(module, make_frames):
+    buf = make_frames(
+        [
+            b"S" + struct.pack(">hh", 1, 0) + (9).to_bytes(6, "big") + b"O",
+            b"D" + struct.pack(">HIid", 5, 10, -1, 1.5),
+        ]
+    )
+
+    # SCHEMA's structs share only message_type
+    assert module.HEADER_DTYPE.names == ("message_type",)
+    assert module.scan_headers(buf)["message_type"].tolist() == [b"S", b"D"]
+
+
+def test_py_gen_header_prefix(load_module, make_frames):
+    source = ItchCompiler().compile_python(
+        """
+        struct SystemEventMessage {
+            message_type:char; stock_locate:ushort; tracking_number:ushort; timestamp:time; event_code:char;
+        }
+        struct OrderDeleteMessage {
+            message_type:char; stock_locate:ushort; tracking_number:ushort; timestamp:time; order_reference_number:ulong;
+        }
+        """
+    )
+    module = load_module(source)
+    buf = make_frames(
+        [
+            b"S" + struct.pack(">HH", 1, 2) + (3).to_bytes(6, "big") + b"O",
+            b"D" + struct.pack(">HH", 4, 5) + (6).to_bytes(6, "big") + struct.pack(">I", 7),
+        ]
+    )
+
+    columns = module.scan_headers(buf)
+
+    assert list(columns) == ["message_type", "stock_locate", "tracking_number", "timestamp"]
+    assert columns["stock_locate"].tolist() == [1, 4]
+    assert columns["timestamp"].tolist() == [3, 6]
+    assert columns["timestamp"].flags.c_contiguous
+    assert module.scan_headers(buf, FrameIndex.build(buf))["timestamp"].tolist() == [3, 6]
+    assert module.decode_columns(buf, FrameIndex.build(buf))[ord("D")]["stock_locate"].tolist() == [4]
+    assert [m.message_type for m in module.iter_messages(buf, locates=[4], time_range=(0, 10))] == [b"D"]
+
+
+def test_py_gen_iter_messages(module, make_frames):
+    buf = make_frames(
+        [
+            b"S" + struct.pack(">hh", 1, 0) + (9).to_bytes(6, "big") + b"O",
+            b"D" + struct.pack(">HIid", 5, 10, -1, 1.5),
+        ]
+    )
+
+    assert list(module.iter_messages(buf, types="D")) == [module.OrderDeleteMessage(b"D", 5, 10, -1, 1.5)]
+    # SCHEMA's structs do not share stock_locate
+    assert module.LOCATE_FIELD is None
+    with pytest.raises(ValueError):
+        list(module.iter_messages(buf, locates=[1]))
+
+
+def test_py_gen_iter_messages_lengths(module, make_frames):
+    delete = b"D" + struct.pack(">HIid", 5, 10, -1, 1.5)
+
+    with pytest.raises(ValueError, match="length 5, expected 12"):
+        list(module.iter_messages(make_frames([b"S\x00\x01\x00\x03", delete])))
+    with pytest.raises(ValueError, match="length 20, expected 19"):
+        list(module.iter_messages(make_frames([delete + b"x"])))
+    assert list(module.iter_messages(make_frames([b"", b"Z", delete]), types="D")) == [
+        module.OrderDeleteMessage(b"D", 5, 10, -1, 1.5)
+    ]
+
+
+def test_py_gen_decode_block(module):
+    event = b"S" + struct.pack(">hh", 1, 0) + (9).to_bytes(6, "big") + b"O"
+    delete = b"D" + struct.pack(">HIid", 5, 10, -1, 1.5)
+
+    assert module.WIRE_LENGTHS == {ord("S"): 12, ord("D"): 19}
+    assert list(module.decode_block(event + delete + event[:4])) == [
+        module.SystemEventMessage(b"S", 1, 0, 9, b"O"),
+        module.OrderDeleteMessage(b"D", 5, 10, -1, 1.5),
+    ]
+
+
+def test_py_gen_runtime_imports(tmp_path, make_frames):
+    (tmp_path / "itch_generated.py").write_text(ItchCompiler().compile_python(SCHEMA))
+    frames = make_frames([b"S" + struct.pack(">hhHIc", 1, 2, 0, 5, b"O")])
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {str(tmp_path)!r})\n"
+        "import itchpy\n"
+        "from itchpy import descriptor, index, native, parallel, reader\n"
+        "import itch_generated\n"
+        f"print(len(itch_generated.decode_columns({frames!r})[ord('S')]))\n"
+        "heavy = ('sly', 'click', 'itchpy.parser', 'itchpy.lexer', 'itchpy.itchc', 'itchpy._version')\n"
+        "print(sorted(name for name in heavy if name in sys.modules))\n"
+    )
+
+    out = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+
+    assert out.splitlines() == ["1", "[]"]
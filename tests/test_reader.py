@@ -0,0 +1,116 @@
+import ctypes
+import struct
+
+import pytest
+
+from itchpy.reader import ItchFile, iter_filtered, iter_spans, iter_unframed
+
+
+@pytest.fixture
+def itch_file(tmp_path, make_frames):
+    path = tmp_path / "day.itch"
+    path.write_bytes(make_frames([b"S\x00\x01", b"D\x00\x02\x00\x03", b"X"]))
+    return path
+
+
+def test_iter_spans(make_frames):
+    buf = make_frames([b"AB", b"C"]) + b"\x00"
+
+    assert list(iter_spans(buf)) == [(2, 2), (6, 1)]
+    assert list(iter_spans(buf, start=4)) == [(6, 1)]
+    assert list(iter_spans(buf, end=6)) == [(2, 2)]
+
+
+def test_frames_are_views(itch_file):
+    with ItchFile(itch_file) as f:
+        frames = list(f.frames())
+        assert [type(fr) for fr in frames] == [memoryview] * 3
+        assert [fr.obj for fr in frames] == [f.buffer.obj] * 3
+        assert [bytes(fr) for fr in frames] == [b"S\x00\x01", b"D\x00\x02\x00\x03", b"X"]
+        del frames
+
+
+def test_close_with_live_slices(itch_file):
+    with ItchFile(itch_file) as f:
+        for fr in f.frames():
+            pass
+        frames = f.filtered(lambda buf, offset: buf[offset : offset + 1])
+        first = next(frames)
+
+    assert f._file.closed
+    assert bytes(fr) == b"X"
+    assert bytes(first) == b"S"
+    del fr, frames, first
+
+
+def test_messages(itch_file):
+    unpack = struct.Struct(">cH").unpack_from
+
+    with ItchFile(itch_file) as f:
+        result = list(f.messages(lambda buf, offset: unpack(buf, offset) if buf[offset] != ord("X") else None))
+
+    assert result == [(b"S", 1), (b"D", 2), None]
+
+
+def test_messages_wire_lengths(itch_file):
+    with ItchFile(itch_file) as f:
+        with pytest.raises(ValueError, match="type 'D' at offset 7 has length 5, expected 3"):
+            list(f.messages(lambda buf, offset: offset, wire_lengths={ord("S"): 3, ord("D"): 3}))
+        assert list(f.messages(lambda buf, offset: offset, wire_lengths={ord("S"): 3, ord("D"): 5})) == [2, 7, 14]
+
+
+def test_address(itch_file):
+    with ItchFile(itch_file) as f:
+        offset, length = next(f.spans())
+        assert ctypes.string_at(f.address + offset, length) == b"S\x00\x01"
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.itch"
+    path.write_bytes(b"")
+
+    with ItchFile(path) as f:
+        assert len(f) == 0
+        assert list(f.frames()) == []
+
+
+def test_iter_filtered(make_frames):
+    locate = (1, struct.Struct(">H"))
+    timestamp = (3, struct.Struct(">HI"))
+    payloads = [
+        b"A" + struct.pack(">H", 1) + (100).to_bytes(6, "big"),
+        b"B" + struct.pack(">H", 2) + (200).to_bytes(6, "big"),
+        b"A" + struct.pack(">H", 2) + (300).to_bytes(6, "big"),
+        b"A",
+    ]
+    buf = make_frames(payloads)
+    seen = []
+
+    def decode(buf, offset):
+        seen.append(offset)
+        return bytes(buf[offset : offset + 3])
+
+    def run(**filters):
+        return list(iter_filtered(buf, decode, locate=locate, timestamp=timestamp, **filters))
+
+    assert run() == [b"A\x00\x01", b"B\x00\x02", b"A\x00\x02", b"A"]
+    assert run(types="B") == [b"B\x00\x02"]
+    assert run(types=[ord("A")], locates={2}) == [b"A\x00\x02"]
+    assert run(time_range=(150, 300)) == [b"B\x00\x02"]
+
+    seen.clear()
+    assert run(locates=[1], time_range=(0, 1000)) == [b"A\x00\x01"]
+    assert seen == [2]
+
+
+def test_iter_filtered_missing_field(make_frames):
+    with pytest.raises(ValueError):
+        list(iter_filtered(make_frames([b"A"]), None, locates=[1]))
+
+
+def test_iter_unframed():
+    buf = b"A\x01\x02" + b"B\x03" + b"A\x04\x05" + b"A\x06"
+
+    assert list(iter_unframed(buf, {ord("A"): 3, ord("B"): 2})) == [(0, 3), (3, 2), (5, 3)]
+    with pytest.raises(ValueError):
+        list(iter_unframed(buf, {ord("A"): 3}))